@@ -1,5 +1,5 @@
-from BaseClasses import MultiWorld, Item
-from typing import Optional, List
+from BaseClasses import MultiWorld, Item, CollectionState
+from typing import Callable, Optional, List
 from worlds.AutoWorld import World
 from .Data import category_table
 from .Items import ManualItem
@@ -126,3 +126,61 @@ def get_items_with_value(world: World, multiworld: MultiWorld, value: str, playe
                             and i.name in world.item_name_groups.get(f'has_{value}_value', [])}
         world.item_values[player][value] = item_with_values
     return world.item_values[player].get(value)
+
+def get_category_count_key(category_name: str) -> str:
+    """Return the name under which ManualWorld.collect keeps the number of collected items of a category,
+    in CollectionState.prog_items. Use state.count(get_category_count_key("Category"), player) to read it.
+    """
+    return f"@{category_name}"
+
+def get_item_value_key(value_name: str) -> str:
+    """Return the name under which ManualWorld.collect keeps the total 'value' of the collected items for a value type,
+    in CollectionState.prog_items. Use state.count(get_item_value_key("Coins"), player) to read it.
+    """
+    return f"${value_name.lower().strip()}"
+
+def get_rule_results(state: CollectionState, player: int) -> dict:
+    """Return the results of the shared access rules already evaluated for this state and player since its last change.\n
+    ManualWorld.collect/remove start a new, empty dict whenever the player's items change, see Rules.SharedRule
+    """
+    rule_results = getattr(state, "manual_rule_results", None)
+    if rule_results is None:
+        rule_results = state.manual_rule_results = {}
+    if player not in rule_results:
+        rule_results[player] = {}
+    return rule_results[player]
+
+def clear_rule_results(state: CollectionState, player: int):
+    rule_results = getattr(state, "manual_rule_results", None)
+    if rule_results:
+        rule_results.pop(player, None)
+
+def state_independent(func):
+    """Decorator for requires functions whose result only depends on the options and the item pool, never on the CollectionState.\n
+    They are called once per player when the rules are set, with state=None, and their result replaces them in the requires.
+    """
+    func.state_independent = True
+    return func
+
+def reaches_regions(get_region_names: Callable):
+    """Decorator for requires functions checking if regions, or locations in them, can be reached.\n
+    get_region_names(world, multiworld, player, *args) is given the same arguments as the function (without the state)
+    and returns the names of those regions. set_rules registers them as indirect conditions of the entrances using
+    the function, so AP knows to check those entrances again when these regions become reachable.
+    eg. @reaches_regions(lambda world, multiworld, player, region: [region])
+    """
+    def decorator(func):
+        func.reached_regions = get_region_names
+        return func
+    return decorator
+
+def unchanged_hook(func):
+    """Decorator for the hooks of hooks/World.py that are still as the template has them, returning what they're given.\n
+    Such a hook can be skipped without changing anything, eg. ManualWorld.create_items_batch does for the item hooks.
+    Remove it when you edit the hook, or your changes will be skipped.
+    """
+    func.unchanged_hook = True
+    return func
+
+def is_unchanged_hook(func: Callable) -> bool:
+    return getattr(func, "unchanged_hook", False)
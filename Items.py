@@ -1,4 +1,5 @@
-from BaseClasses import Item
+from typing import Iterable, Iterator
+from BaseClasses import Item, ItemClassification
 from .Data import item_table
 from .Game import filler_item_name, starting_index
 
@@ -15,8 +16,8 @@ lastItemId = -1
 
 count = starting_index
 
-# add the filler item to the list of items for lookup
-if filler_item_name:
+# add the filler item to the list of items for lookup, unless the after_load_item_file hook already placed it
+if filler_item_name and not any(item["name"] == filler_item_name for item in item_table):
     item_table.append({
         "name": filler_item_name
     })
@@ -56,6 +57,28 @@ for item in item_table:
 item_id_to_name[None] = "__Victory__"
 item_name_to_id = {name: id for id, name in item_id_to_name.items()}
 
+def get_item_classification(item: dict) -> ItemClassification:
+    classification = ItemClassification.filler
+
+    if "trap" in item and item["trap"]:
+        classification = ItemClassification.trap
+
+    if "useful" in item and item["useful"]:
+        classification = ItemClassification.useful
+
+    if "progression" in item and item["progression"]:
+        classification = ItemClassification.progression
+
+    if "progression_skip_balancing" in item and item["progression_skip_balancing"]:
+        classification = ItemClassification.progression_skip_balancing
+
+    return classification
+
+# what create_item needs to make an item of each name, worked out once instead of for every item made
+item_name_to_code_and_classification: dict[str, tuple[int, ItemClassification]] = {
+    item_name: (item_name_to_id[item_name], get_item_classification(item)) for item_name, item in item_name_to_item.items()
+}
+
 
 ######################
 # Item classes
@@ -64,3 +87,77 @@ item_name_to_id = {name: id for id, name in item_id_to_name.items()}
 
 class ManualItem(Item):
     game = "Manual"
+
+
+class ManualItemPool:
+    """The item pool of a player while it's being built, indexed by item name.
+    Works like the list of items it replaces (iterate, len, append, extend, remove), with take(name) and remove_names(names)
+    to remove items by name without looking through the whole pool. Turn it into a list with list(pool).
+    """
+
+    def __init__(self, items: Iterable[Item] = ()):
+        self.items_by_name: dict[str, list[Item]] = {}
+        self.length = 0
+        self.extend(items)
+
+    def __iter__(self) -> Iterator[Item]:
+        for items in self.items_by_name.values():
+            yield from items
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __contains__(self, item: Item) -> bool:
+        return item in self.items_by_name.get(item.name, ())
+
+    def __iadd__(self, items: Iterable[Item]) -> "ManualItemPool":
+        self.extend(items)
+        return self
+
+    def append(self, item: Item):
+        if item.name not in self.items_by_name:
+            self.items_by_name[item.name] = []
+        self.items_by_name[item.name].append(item)
+        self.length += 1
+
+    def extend(self, items: Iterable[Item]):
+        for item in items:
+            self.append(item)
+
+    def count_name(self, name: str) -> int:
+        return len(self.items_by_name.get(name, ()))
+
+    def take(self, name: str) -> Item:
+        """Remove an item with this name from the pool and return it. Raises a ValueError if there is none."""
+        items = self.items_by_name.get(name)
+        if not items:
+            raise ValueError(f"There is no '{name}' left in the item pool.")
+        self.length -= 1
+        return items.pop()
+
+    def remove(self, item: Item):
+        """Remove this item from the pool, or an item equal to it (same name and player) if it isn't in it."""
+        items = self.items_by_name.get(item.name)
+        if not items:
+            raise ValueError(f"There is no '{item.name}' left in the item pool.")
+        for index in range(len(items) - 1, -1, -1):
+            if items[index] is item:
+                del items[index]
+                break
+        else:
+            items.remove(item)
+        self.length -= 1
+
+    def remove_names(self, names: Iterable[str]) -> list[Item]:
+        """Remove one item for each time a name is given and return them, eg. ["Item", "Item"] removes two of Item"""
+        return [self.take(name) for name in names]
+
+    def items_named(self, names: Iterable[str]) -> list[Item]:
+        """Every item of the pool with one of these names, in pool order. Doesn't remove them."""
+        names = set(names)
+        return [item for name, items in self.items_by_name.items() if name in names for item in items]
+
+    @classmethod
+    def of(cls, items: Iterable[Item]) -> "ManualItemPool":
+        """The given pool itself, or a new pool of the given items if a hook returned a list."""
+        return items if isinstance(items, cls) else cls(items)
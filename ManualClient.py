@@ -154,6 +154,18 @@ class ManualContext(SuperContext):
         name = self.item_names.lookup_in_game(id)
         return self.get_item_by_name(name)
 
+    def get_item_category_weight(self, item, category_name) -> int:
+        """How much one of the item counts toward the count of a category: 1, or its value named by the category's
+        "count_value" in categories.json if it has one. eg. with "count_value": "Medals", a "Medal x5" item with a Medals value of 5 counts as 5."""
+        category_settings = self.category_table.get(category_name) or getattr(AutoWorldRegister.world_types[self.game], "category_table", {}).get(category_name, {})
+        count_value = category_settings.get("count_value")
+        if not count_value:
+            return 1
+        for value_name, value in item.get("value", {}).items():
+            if value_name.lower().strip() == count_value.lower().strip():
+                return int(value)
+        return 1
+
     def update_ids(self, data_package) -> None:
         self.location_names_to_id = data_package['location_name_to_id']
         self.item_names_to_id = data_package['item_name_to_id']
@@ -525,7 +537,7 @@ class ManualContext(SuperContext):
                                             item.bold = True if old_item_text != item.text else False
 
                                         if item_count > 0:
-                                            category_count += item_count
+                                            category_count += item_count * self.ctx.get_item_category_weight(self.ctx.get_item_by_name(item_name), category_name)
                                             category_unique_name_count += 1
 
                                 # Label (for new item listings)
@@ -544,7 +556,7 @@ class ManualContext(SuperContext):
                                         category_grid.add_widget(item_text)
                                         self.listed_items[category_name].append(network_item.item)
 
-                                        category_count += item_count
+                                        category_count += item_count * self.ctx.get_item_category_weight(item_data, category_name)
                                         category_unique_name_count += 1
 
                             scrollview_height = 30 * category_unique_name_count
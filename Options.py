@@ -11,9 +11,13 @@ class FillerTrapPercent(Range):
     """How many fillers will be replaced with traps. 0 means no additional traps, 100 means all fillers are traps."""
     range_end = 100
 
+class RemoveImpossibleLocations(Toggle):
+    """Remove the locations that can never be reached with the items of this world, instead of only listing them in the generation log."""
+
 manual_options = before_options_defined({})
 
 manual_options["start_inventory_from_pool"] = StartInventoryPool
+manual_options["remove_impossible_locations"] = RemoveImpossibleLocations
 
 if len(victory_names) > 1:
     goal = {'option_' + v: i for i, v in enumerate(victory_names)}
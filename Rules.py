@@ -1,240 +1,1214 @@
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Callable, Iterable, Optional
+from collections import Counter
 from worlds.generic.Rules import set_rule
 from .Regions import regionMap
 from .hooks import Rules
-from BaseClasses import MultiWorld, CollectionState
-from .Helpers import clamp, is_item_enabled, get_items_with_value, is_option_enabled
+from BaseClasses import MultiWorld, CollectionState, Location, Item
+from .Helpers import clamp, is_item_enabled, is_option_enabled, get_category_count_key, get_item_value_key, get_rule_results, state_independent, reaches_regions
 from worlds.AutoWorld import World
+import Utils
 
+import os
 import re
+import json
+import hashlib
+import importlib.util
 import math
+import bisect
+import time
 import inspect
 import logging
 
+try:
+    import numpy as np
+except ImportError: # numpy is optional, it's only needed by BatchReachability
+    np = None
+
 if TYPE_CHECKING:
     from . import ManualWorld
 
-def infix_to_postfix(expr, location):
-    prec = {"&": 2, "|": 2, "!": 3}
+# Placeholders used while tokenizing a requires string, so that function calls and item references
+# can be parsed on their own before the boolean structure around them is.
+FUNCTION_PLACEHOLDER = "\x00{}\x00"
+ITEM_PLACEHOLDER = "\x01{}\x01"
 
-    stack = []
-    postfix = ""
+requires_function_pattern = re.compile(r'\{(\w+)\((.*?)\)\}')
+requires_item_pattern = re.compile(r'\|[^|]+\|')
+requires_token_pattern = re.compile(r'\x00(\d+)\x00|\x01(\d+)\x01|\(|\)|!|&|\band\b|\bor\b|\d+', re.IGNORECASE)
 
-    try:
-        for c in expr:
-            if c.isnumeric():
-                postfix += c
-            elif c in prec:
-                while stack and stack[-1] != "(" and prec[c] <= prec[stack[-1]]:
-                    postfix += stack.pop()
-                stack.append(c)
-            elif c == "(":
-                stack.append(c)
-            elif c == ")":
-                while stack and stack[-1] != "(":
-                    postfix += stack.pop()
-                stack.pop()
-        while stack:
-            postfix += stack.pop()
-    except Exception:
-        raise KeyError("Invalid logic format for location/region {}.".format(location))
-    return postfix
-
-
-def evaluate_postfix(expr: str, location: str) -> bool:
-    stack = []
-    try:
-        for c in expr:
-            if c == "0":
-                stack.append(False)
-            elif c == "1":
-                stack.append(True)
-            elif c == "&":
-                op2 = stack.pop()
-                op1 = stack.pop()
-                stack.append(op1 and op2)
-            elif c == "|":
-                op2 = stack.pop()
-                op1 = stack.pop()
-                stack.append(op1 or op2)
-            elif c == "!":
-                op = stack.pop()
-                stack.append(not op)
-    except Exception:
-        raise KeyError("Invalid logic format for location/region {}.".format(location))
-
-    if len(stack) != 1:
-        raise KeyError("Invalid logic format for location/region {}.".format(location))
-    return stack.pop()
+# rough cost of calling a requires function compared to counting an item, see RequireNode.get_cost
+FUNCTION_COST = 100
+# past this many "all of these counts" alternatives, a requires is left to its access rule by BatchReachability
+MAX_BATCH_TERMS = 64
 
-def set_rules(world: "ManualWorld", multiworld: MultiWorld, player: int):
-    # this is only called when the area (think, location or region) has a "requires" field that is a string
-    def checkRequireStringForArea(state: CollectionState, area: dict):
-        requires_list = area["requires"]
+# bump it when the source written by RequireNode.to_source changes, so the generated rules already in the cache aren't used
+GENERATED_RULES_VERSION = 3
+
+# caches of parse_requires, get_requires_function, get_req_function_parameters and get_generated_rules
+parsed_requires: dict[str, "RequireNode"] = {}
+requires_functions: dict[str, Callable] = {}
+req_function_parameters: dict[Callable, list[tuple[inspect.Parameter, Optional[type], bool]]] = {}
+generated_rules: dict[str, dict[str, "RequireGenerated"]] = {}
+# (player, location) pairs get_location_reached_regions is currently following
+locations_being_reached: set[tuple[int, str]] = set()
+
+
+class RequireNode:
+    """A parsed piece of a requires string. Call compile() to turn it into an access rule."""
+
+    def compile(self, world: "ManualWorld", multiworld: MultiWorld, player: int) -> Callable[[CollectionState], bool]:
+        raise NotImplementedError
+
+    def get_threshold(self) -> Optional[tuple[str, int]]:
+        """If this node only requires having at least N of something, return the state.count key and N"""
+        return None
+
+    def get_dependencies(self) -> Optional[set[str]]:
+        """Return the state.count keys (item names and category keys) this node reads,
+        or None if it calls functions and could depend on anything"""
+        return set()
+
+    def get_cost(self) -> int:
+        """Rough cost of evaluating this node, used to pick which operand of an and/or is evaluated first"""
+        return 1
+
+    def fold(self, world: "ManualWorld", multiworld: MultiWorld, player: int) -> "RequireNode":
+        """Return a copy of this node for this player where the functions marked with @state_independent
+        are replaced by their result. Nodes are never modified, so a parsed requires can be shared between players."""
+        return self
+
+    def get_terms(self, world: "ManualWorld") -> Optional[list[dict[str, int]]]:
+        """Return this node as alternatives of state.count key -> minimum count maps, where having every count of
+        one of the maps is the same as this node being true. None if it can't be written that way, see BatchReachability"""
+        return None
+
+    def to_source(self, world: "ManualWorld") -> Optional[str]:
+        """Return a Python expression of 'state' and 'player' equivalent to this node, for the generated rules module,
+        or None if it can't be written as one (see get_generated_rules)"""
+        return None
+
+    def get_reached_regions(self, world: "ManualWorld", multiworld: MultiWorld, player: int) -> set[str]:
+        """Return the names of the regions whose reachability this node checks, through functions marked with @reaches_regions"""
+        return set()
+
+
+class RequireConstant(RequireNode):
+    """A literal number in a requires string (0 is false, anything else is true), or an empty requires."""
+
+    def __init__(self, value: bool):
+        self.value = value
+
+    def compile(self, world: "ManualWorld", multiworld: MultiWorld, player: int) -> Callable[[CollectionState], bool]:
+        value = self.value
+        return lambda state: value
+
+    def get_terms(self, world: "ManualWorld") -> Optional[list[dict[str, int]]]:
+        return [{}] if self.value else []
+
+    def to_source(self, world: "ManualWorld") -> Optional[str]:
+        return repr(bool(self.value))
 
-        # Get the "real" item counts of item in the pool/placed/starting_items
+
+class RequireItem(RequireNode):
+    """|Item Name| or |Item Name:count|, where count is a number, 'all', 'half' or a percentage."""
+
+    def __init__(self, name: str, count: int|str):
+        self.name = name
+        self.count = count
+
+    def compile(self, world: "ManualWorld", multiworld: MultiWorld, player: int) -> Callable[[CollectionState], bool]:
+        if not isinstance(self.count, int):
+            return self.fold(world, multiworld, player).compile(world, multiworld, player)
+
+        item_name = self.name
+        item_count = self.count
+        return lambda state: state.has(item_name, player, item_count)
+
+    def fold(self, world: "ManualWorld", multiworld: MultiWorld, player: int) -> RequireNode:
+        # 'all', 'half' and '%' become a number of items once, from the player's item counts
+        if isinstance(self.count, int):
+            return self
+        total = world.get_item_counts(player).get(self.name, 0)
+        return RequireItem(self.name, resolve_requires_count(self.count, total))
+
+    def get_threshold(self) -> Optional[tuple[str, int]]:
+        if isinstance(self.count, int) and self.count > 0:
+            return self.name, self.count
+        return None
+
+    def get_dependencies(self) -> Optional[set[str]]:
+        return {self.name}
+
+    def get_terms(self, world: "ManualWorld") -> Optional[list[dict[str, int]]]:
+        if not isinstance(self.count, int):
+            return None
+        return [{self.name: self.count}]
+
+    def to_source(self, world: "ManualWorld") -> Optional[str]:
+        if not isinstance(self.count, int):
+            return None
+        return f"state.has({self.name!r}, player, {self.count})"
+
+
+class RequireCategory(RequireNode):
+    """|@Category Name| or |@Category Name:count|, counting every item of the category together."""
+
+    def __init__(self, name: str, count: int|str):
+        self.name = name
+        self.count = count
+
+    def compile(self, world: "ManualWorld", multiworld: MultiWorld, player: int) -> Callable[[CollectionState], bool]:
+        if not isinstance(self.count, int):
+            return self.fold(world, multiworld, player).compile(world, multiworld, player)
+
+        if not self.get_items(world):
+            return lambda state: False
+
+        category_count = self.count
+        # ManualWorld.collect keeps the collected count of the whole category under this key
+        category_key = get_category_count_key(self.name)
+        return lambda state: state.has(category_key, player, category_count)
+
+    def fold(self, world: "ManualWorld", multiworld: MultiWorld, player: int) -> RequireNode:
+        # 'all', 'half' and '%' become a number of items once, from the player's item counts
+        if isinstance(self.count, int):
+            return self
         items_counts = world.get_item_counts(player)
+        total = sum(items_counts.get(item_name, 0) for item_name in self.get_items(world))
+        return RequireCategory(self.name, resolve_requires_count(self.count, total))
 
-        if requires_list == "":
-            return True
+    def get_items(self, world: "ManualWorld") -> list[str]:
+        return [item["name"] for item in world.item_name_to_item.values() if self.name in item.get("category", [])]
+
+    def get_threshold(self) -> Optional[tuple[str, int]]:
+        if isinstance(self.count, int) and self.count > 0:
+            return get_category_count_key(self.name), self.count
+        return None
+
+    def get_dependencies(self) -> Optional[set[str]]:
+        return {get_category_count_key(self.name)}
+
+    def get_terms(self, world: "ManualWorld") -> Optional[list[dict[str, int]]]:
+        if not isinstance(self.count, int):
+            return None
+        if not self.get_items(world):
+            return []
+        return [{get_category_count_key(self.name): self.count}]
 
-        for item in re.findall(r'\{(\w+)\((.*?)\)\}', requires_list):
-            func_name = item[0]
-            func_args = item[1].split(",")
-            if func_args == ['']:
-                func_args.pop()
+    def to_source(self, world: "ManualWorld") -> Optional[str]:
+        terms = self.get_terms(world)
+        if terms is None:
+            return None
+        if not terms:
+            return "False"
+        return f"state.has({get_category_count_key(self.name)!r}, player, {self.count})"
 
-            func = globals().get(func_name)
 
-            if func is None:
-                func = getattr(Rules, func_name, None)
+class RequireValue(RequireNode):
+    """{ItemValue(Value Name:count)}, the total value of the collected items, kept by ManualWorld.collect like a category count."""
 
-            if not callable(func):
-                raise ValueError(f"Invalid function `{func_name}` in {area}.")
+    def __init__(self, name: str, count: int):
+        self.name = name
+        self.count = count
 
-            convert_req_function_args(func, func_args, area.get("name", f"An area with these parameters: {area}"))
-            result = func(world, multiworld, state, player, *func_args)
+    def compile(self, world: "ManualWorld", multiworld: MultiWorld, player: int) -> Callable[[CollectionState], bool]:
+        value_key = get_item_value_key(self.name)
+        value_count = self.count
+        return lambda state: state.has(value_key, player, value_count)
+
+    def get_threshold(self) -> Optional[tuple[str, int]]:
+        if self.count > 0:
+            return get_item_value_key(self.name), self.count
+        return None
+
+    def get_dependencies(self) -> Optional[set[str]]:
+        return {get_item_value_key(self.name)}
+
+    def get_terms(self, world: "ManualWorld") -> Optional[list[dict[str, int]]]:
+        return [{get_item_value_key(self.name): self.count}]
+
+    def to_source(self, world: "ManualWorld") -> Optional[str]:
+        return f"state.has({get_item_value_key(self.name)!r}, player, {self.count})"
+
+
+class RequireFunction(RequireNode):
+    """{FunctionName(args)}, calling a function from this file or hooks/Rules.py.
+    A string result is itself evaluated as a requires string, as one operand on its own, as if it was in parentheses:
+    it is no longer pasted into the surrounding requires text before that is evaluated.
+    eg. "|A| and {Func()}" where Func returns "|B| or |C|" now needs A and one of B or C,
+    where it used to be read left to right as "(|A| and |B|) or |C|".
+    A function inside an item count, like |Item:{Func()}|, still gives the count of that item."""
+
+    def __init__(self, name: str, func: Callable, args: list, area_name: str):
+        self.name = name
+        self.func = func
+        self.args = args
+        self.area_name = area_name
+
+    def call(self, world: "ManualWorld", multiworld: MultiWorld, state: CollectionState, player: int):
+        return self.func(world, multiworld, state, player, *self.args)
+
+    def compile(self, world: "ManualWorld", multiworld: MultiWorld, player: int) -> Callable[[CollectionState], bool]:
+        result_rules = {}
+
+        def rule(state: CollectionState) -> bool:
+            result = self.call(world, multiworld, state, player)
             if isinstance(result, bool):
-                requires_list = requires_list.replace("{" + func_name + "(" + item[1] + ")}", "1" if result else "0")
-            else:
-                requires_list = requires_list.replace("{" + func_name + "(" + item[1] + ")}", str(result))
+                return result
+            if isinstance(result, str):
+                if result not in result_rules:
+                    result_rules[result] = parse_requires(result, self.area_name).compile(world, multiworld, player)
+                return result_rules[result](state)
+            return bool(result)
 
+        return rule
 
-        # parse user written statement into list of each item
-        for item in re.findall(r'\|[^|]+\|', requires_list):
-            require_type = 'item'
+    def get_dependencies(self) -> Optional[set[str]]:
+        return None
 
-            if '|@' in item:
-                require_type = 'category'
+    def get_cost(self) -> int:
+        return FUNCTION_COST
 
-            item_base = item
-            item = item.lstrip('|@$').rstrip('|')
+    def is_state_independent(self) -> bool:
+        return getattr(self.func, "state_independent", False)
 
-            item_parts = item.split(":")  # type: list[str]
-            item_name = item
-            item_count = "1"
+    def get_reached_regions(self, world: "ManualWorld", multiworld: MultiWorld, player: int) -> set[str]:
+        if not hasattr(self.func, "reached_regions"):
+            return set()
+        return set(self.func.reached_regions(world, multiworld, player, *self.args))
 
+    def fold(self, world: "ManualWorld", multiworld: MultiWorld, player: int) -> RequireNode:
+        if not self.is_state_independent():
+            return self
 
-            if len(item_parts) > 1:
-                item_name = item_parts[0].strip()
-                item_count = item_parts[1].strip()
+        result = self.call(world, multiworld, None, player)
+        if isinstance(result, str):
+            return parse_requires(result, self.area_name).fold(world, multiworld, player)
+        return RequireConstant(bool(result))
 
-            total = 0
 
-            if require_type == 'category':
-                category_items = [item for item in world.item_name_to_item.values() if "category" in item and item_name in item["category"]]
-                category_items_counts = sum([items_counts.get(category_item["name"], 0) for category_item in category_items])
-                if item_count.lower() == 'all':
-                    item_count = category_items_counts
-                elif item_count.lower() == 'half':
-                    item_count = int(category_items_counts / 2)
-                elif item_count.endswith('%') and len(item_count) > 1:
-                    percent = clamp(float(item_count[:-1]) / 100, 0, 1)
-                    item_count = math.ceil(category_items_counts * percent)
-                else:
-                    try:
-                        item_count = int(item_count)
-                    except ValueError as e:
-                        raise ValueError(f"Invalid item count `{item_name}` in {area}.") from e
-
-                for category_item in category_items:
-                    total += state.count(category_item["name"], player)
-
-                    if total >= item_count:
-                        requires_list = requires_list.replace(item_base, "1")
-            elif require_type == 'item':
-                item_current_count = items_counts.get(item_name, 0)
-                if item_count.lower() == 'all':
-                    item_count = item_current_count
-                elif item_count.lower() == 'half':
-                    item_count = int(item_current_count / 2)
-                elif item_count.endswith('%') and len(item_count) > 1:
-                    percent = clamp(float(item_count[:-1]) / 100, 0, 1)
-                    item_count = math.ceil(item_current_count * percent)
-                else:
-                    item_count = int(item_count)
+class RequireTemplate(RequireNode):
+    """An item or category reference with function calls inside it, eg. |Item:{FunctionName()}|.
+    The functions are called first and their results are put in the text before it is evaluated."""
 
-                total = state.count(item_name, player)
+    def __init__(self, text: str, functions: list[RequireFunction], area_name: str):
+        self.text = text
+        self.functions = functions
+        self.area_name = area_name
 
-                if total >= item_count:
-                    requires_list = requires_list.replace(item_base, "1")
+    def compile(self, world: "ManualWorld", multiworld: MultiWorld, player: int) -> Callable[[CollectionState], bool]:
+        text_rules = {}
 
-            if total <= item_count:
-                requires_list = requires_list.replace(item_base, "0")
+        def rule(state: CollectionState) -> bool:
+            text = self.fill(world, multiworld, state, player)
+            if text not in text_rules:
+                text_rules[text] = parse_requires(text, self.area_name).compile(world, multiworld, player)
+            return text_rules[text](state)
 
-        requires_list = re.sub(r'\s?\bAND\b\s?', '&', requires_list, 0, re.IGNORECASE)
-        requires_list = re.sub(r'\s?\bOR\b\s?', '|', requires_list, 0, re.IGNORECASE)
+        return rule
 
-        requires_string = infix_to_postfix("".join(requires_list), area)
-        return (evaluate_postfix(requires_string, area))
+    def get_cost(self) -> int:
+        return FUNCTION_COST * len(self.functions)
 
-    # this is only called when the area (think, location or region) has a "requires" field that is a dict
-    def checkRequireDictForArea(state: CollectionState, area: dict):
-        canAccess = True
+    def fill(self, world: "ManualWorld", multiworld: MultiWorld, state: Optional[CollectionState], player: int) -> str:
+        """Call the functions and put their results in the text"""
+        text = self.text
+        for index, function in enumerate(self.functions):
+            result = function.call(world, multiworld, state, player)
+            if isinstance(result, bool):
+                result = "1" if result else "0"
+            text = text.replace(FUNCTION_PLACEHOLDER.format(index), str(result))
+        return text
 
-        for item in area["requires"]:
-            # if the require entry is an object with "or" or a list of items, treat it as a standalone require of its own
-            if (isinstance(item, dict) and "or" in item and isinstance(item["or"], list)) or (isinstance(item, list)):
-                canAccessOr = True
-                or_items = item
+    def get_dependencies(self) -> Optional[set[str]]:
+        return None
 
-                if isinstance(item, dict):
-                    or_items = item["or"]
+    def get_reached_regions(self, world: "ManualWorld", multiworld: MultiWorld, player: int) -> set[str]:
+        return set().union(*(function.get_reached_regions(world, multiworld, player) for function in self.functions))
 
-                for or_item in or_items:
-                    or_item_parts = or_item.split(":")
-                    or_item_name = or_item
-                    or_item_count = 1
+    def fold(self, world: "ManualWorld", multiworld: MultiWorld, player: int) -> RequireNode:
+        if not all(function.is_state_independent() for function in self.functions):
+            return self
 
-                    if len(or_item_parts) > 1:
-                        or_item_name = or_item_parts[0]
-                        or_item_count = int(or_item_parts[1])
+        return parse_requires(self.fill(world, multiworld, None, player), self.area_name).fold(world, multiworld, player)
 
-                    if not state.has(or_item_name, player, or_item_count):
-                        canAccessOr = False
 
-                if canAccessOr:
-                    canAccess = True
-                    break
-            else:
-                item_parts = item.split(":")
-                item_name = item
-                item_count = 1
+class RequireCounts(RequireNode):
+    """An entry of a list-form requires, eg. ["Item A", "Item B:2"], as a map of item name to count that must all be had."""
 
-                if len(item_parts) > 1:
-                    item_name = item_parts[0]
-                    item_count = int(item_parts[1])
+    def __init__(self, item_counts: dict[str, int]):
+        self.item_counts = item_counts
 
-                if not state.has(item_name, player, item_count):
-                    canAccess = False
+    def compile(self, world: "ManualWorld", multiworld: MultiWorld, player: int) -> Callable[[CollectionState], bool]:
+        item_counts = self.item_counts
 
-        return canAccess
+        if len(item_counts) == 1:
+            (item_name, item_count), = item_counts.items()
+            return lambda state: state.has(item_name, player, item_count)
+        if all(item_count == 1 for item_count in item_counts.values()):
+            item_names = list(item_counts)
+            return lambda state: state.has_all(item_names, player)
+        return lambda state: state.has_all_counts(item_counts, player)
+
+    def get_threshold(self) -> Optional[tuple[str, int]]:
+        if len(self.item_counts) == 1:
+            (item_name, item_count), = self.item_counts.items()
+            if item_count > 0:
+                return item_name, item_count
+        return None
+
+    def get_dependencies(self) -> Optional[set[str]]:
+        return set(self.item_counts)
+
+    def get_terms(self, world: "ManualWorld") -> Optional[list[dict[str, int]]]:
+        return [dict(self.item_counts)]
+
+    def to_source(self, world: "ManualWorld") -> Optional[str]:
+        if not self.item_counts:
+            return "True"
+        return "(" + " and ".join(f"state.has({item_name!r}, player, {item_count})" for item_name, item_count in self.item_counts.items()) + ")"
+
+
+class RequireNot(RequireNode):
+    def __init__(self, child: RequireNode):
+        self.child = child
+
+    def compile(self, world: "ManualWorld", multiworld: MultiWorld, player: int) -> Callable[[CollectionState], bool]:
+        child = self.child.compile(world, multiworld, player)
+        return lambda state: not child(state)
+
+    def get_dependencies(self) -> Optional[set[str]]:
+        return self.child.get_dependencies()
+
+    def get_reached_regions(self, world: "ManualWorld", multiworld: MultiWorld, player: int) -> set[str]:
+        return self.child.get_reached_regions(world, multiworld, player)
+
+    def get_cost(self) -> int:
+        return self.child.get_cost()
+
+    def to_source(self, world: "ManualWorld") -> Optional[str]:
+        child = self.child.to_source(world)
+        if child is None:
+            return None
+        return f"(not {child})"
+
+    def fold(self, world: "ManualWorld", multiworld: MultiWorld, player: int) -> RequireNode:
+        child = self.child.fold(world, multiworld, player)
+        if isinstance(child, RequireConstant):
+            return RequireConstant(not child.value)
+        if child is self.child:
+            return self
+        return RequireNot(child)
+
+
+class RequireAnd(RequireNode):
+    def __init__(self, children: list[RequireNode]):
+        self.children = children
+
+    def fold(self, world: "ManualWorld", multiworld: MultiWorld, player: int) -> RequireNode:
+        children = []
+        for child in self.children:
+            folded = child.fold(world, multiworld, player)
+            if isinstance(folded, RequireConstant):
+                if folded.value is False:
+                    return RequireConstant(False)
+                continue
+            children.append(folded)
+
+        if not children:
+            return RequireConstant(True)
+        if len(children) == 1:
+            return children[0]
+        if len(children) == len(self.children) and all(new is old for new, old in zip(children, self.children)):
+            return self
+        return RequireAnd(children)
+
+    def compile(self, world: "ManualWorld", multiworld: MultiWorld, player: int) -> Callable[[CollectionState], bool]:
+        return compile_operands(self.children, True, world, multiworld, player)
+
+    def get_terms(self, world: "ManualWorld") -> Optional[list[dict[str, int]]]:
+        terms = [{}]
+        for child in self.children:
+            child_terms = child.get_terms(world)
+            if child_terms is None or len(terms) * len(child_terms) > MAX_BATCH_TERMS:
+                return None
+            terms = [merge_terms(term, child_term) for term in terms for child_term in child_terms]
+        return terms
+
+    def to_source(self, world: "ManualWorld") -> Optional[str]:
+        return operands_to_source(self.children, "and", world)
+
+    def get_dependencies(self) -> Optional[set[str]]:
+        return merge_dependencies(child.get_dependencies() for child in self.children)
+
+    def get_reached_regions(self, world: "ManualWorld", multiworld: MultiWorld, player: int) -> set[str]:
+        return set().union(*(child.get_reached_regions(world, multiworld, player) for child in self.children))
+
+    def get_cost(self) -> int:
+        return sum(child.get_cost() for child in self.children)
+
+
+class RequireOr(RequireNode):
+    def __init__(self, children: list[RequireNode]):
+        self.children = children
+
+    def fold(self, world: "ManualWorld", multiworld: MultiWorld, player: int) -> RequireNode:
+        children = []
+        for child in self.children:
+            folded = child.fold(world, multiworld, player)
+            if isinstance(folded, RequireConstant):
+                if folded.value is True:
+                    return RequireConstant(True)
+                continue
+            children.append(folded)
+
+        if not children:
+            return RequireConstant(False)
+        if len(children) == 1:
+            return children[0]
+        if len(children) == len(self.children) and all(new is old for new, old in zip(children, self.children)):
+            return self
+        return RequireOr(children)
+
+    def compile(self, world: "ManualWorld", multiworld: MultiWorld, player: int) -> Callable[[CollectionState], bool]:
+        return compile_operands(self.children, False, world, multiworld, player)
+
+    def get_terms(self, world: "ManualWorld") -> Optional[list[dict[str, int]]]:
+        terms = []
+        for child in self.children:
+            child_terms = child.get_terms(world)
+            if child_terms is None or len(terms) + len(child_terms) > MAX_BATCH_TERMS:
+                return None
+            terms.extend(child_terms)
+        return terms
+
+    def to_source(self, world: "ManualWorld") -> Optional[str]:
+        return operands_to_source(self.children, "or", world)
+
+    def get_dependencies(self) -> Optional[set[str]]:
+        return merge_dependencies(child.get_dependencies() for child in self.children)
+
+    def get_reached_regions(self, world: "ManualWorld", multiworld: MultiWorld, player: int) -> set[str]:
+        return set().union(*(child.get_reached_regions(world, multiworld, player) for child in self.children))
+
+    def get_cost(self) -> int:
+        return sum(child.get_cost() for child in self.children)
 
-    # handle any type of checking needed, then ferry the check off to a dedicated method for that check
-    def fullLocationOrRegionCheck(state: CollectionState, area: dict):
-        # if it's not a usable object of some sort, default to true
-        if not area:
-            return True
 
-        # don't require the "requires" key for locations and regions if they don't need to use it
-        if "requires" not in area.keys():
+class RequireGenerated(RequireNode):
+    """A requires string loaded from the generated rules module, see get_generated_rules.
+    It has its rule and what the parsed nodes would have told about them, so the string is never parsed."""
+
+    def __init__(self, make_rule: Callable[[int], Callable[[CollectionState], bool]], source: str, dependencies: list[str],
+                 threshold: Optional[tuple[str, int]], cost: int, terms: Optional[list[dict[str, int]]]):
+        self.make_rule = make_rule
+        self.source = source
+        self.dependencies = set(dependencies)
+        self.threshold = threshold
+        self.cost = cost
+        self.terms = terms
+
+    def compile(self, world: "ManualWorld", multiworld: MultiWorld, player: int) -> Callable[[CollectionState], bool]:
+        return self.make_rule(player)
+
+    def get_threshold(self) -> Optional[tuple[str, int]]:
+        return self.threshold
+
+    def get_dependencies(self) -> Optional[set[str]]:
+        return self.dependencies
+
+    def get_cost(self) -> int:
+        return self.cost
+
+    def get_terms(self, world: "ManualWorld") -> Optional[list[dict[str, int]]]:
+        return self.terms
+
+    def to_source(self, world: "ManualWorld") -> Optional[str]:
+        return self.source
+
+
+def compile_operands(nodes: list[RequireNode], is_and: bool, world: "ManualWorld", multiworld: MultiWorld, player: int) -> Callable[[CollectionState], bool]:
+    """Compile the operands of an and (or of an or) into a rule that stops at the first operand deciding the result.\n
+    Cheap operands are evaluated first. If some of them call functions, their real cost is measured
+    for the first calls and the order is then picked from it, see MeasuredOperands.
+    """
+    nodes = sorted(nodes, key=lambda node: node.get_cost())
+    children = [node.compile(world, multiworld, player) for node in nodes]
+
+    if any(node.get_dependencies() is None for node in nodes):
+        return MeasuredOperands(children, is_and)
+    return short_circuit(children, is_and)
+
+def operands_to_source(nodes: list[RequireNode], operator: str, world: "ManualWorld") -> Optional[str]:
+    """The source of an and/or for the generated rules module, with the cheap operands first like compile_operands"""
+    sources = [node.to_source(world) for node in sorted(nodes, key=lambda node: node.get_cost())]
+    if None in sources:
+        return None
+    return "(" + f" {operator} ".join(sources) + ")"
+
+def short_circuit(children: list[Callable[[CollectionState], bool]], is_and: bool) -> Callable[[CollectionState], bool]:
+    if len(children) == 2:
+        first, second = children
+        if is_and:
+            return lambda state: first(state) and second(state)
+        return lambda state: first(state) or second(state)
+    if is_and:
+        return lambda state: all(child(state) for child in children)
+    return lambda state: any(child(state) for child in children)
+
+
+class MeasuredOperands:
+    """Rule for the operands of an and/or where some operands call functions.\n
+    The first MEASURED_CALLS calls short-circuit in the cost order of compile_operands like any and/or, timing the operands
+    they evaluate and counting how often each decided the result (false for an and, true for an or). After that the operands
+    are ordered by time spent per deciding result, so the ones most likely to end the evaluation cheaply go first.
+    Operands that were never evaluated keep their place after the others.
+    """
+    MEASURED_CALLS = 32
+
+    def __init__(self, children: list[Callable[[CollectionState], bool]], is_and: bool):
+        self.children = children
+        self.is_and = is_and
+        self.calls = 0
+        self.times = [0.0] * len(children)
+        self.evaluated = [0] * len(children)
+        self.decisive = [0] * len(children)
+        self.evaluate = self.measure
+
+    def __call__(self, state: CollectionState) -> bool:
+        return self.evaluate(state)
+
+    def measure(self, state: CollectionState) -> bool:
+        result = self.is_and
+        for index, child in enumerate(self.children):
+            start = time.perf_counter()
+            child_result = child(state)
+            self.times[index] += time.perf_counter() - start
+            self.evaluated[index] += 1
+            if child_result != self.is_and:
+                self.decisive[index] += 1
+                result = child_result
+                break
+
+        self.calls += 1
+        if self.calls >= self.MEASURED_CALLS:
+            order = sorted(range(len(self.children)), key=lambda index: (self.evaluated[index] == 0, self.times[index] / (self.decisive[index] + 1)))
+            self.evaluate = short_circuit([self.children[index] for index in order], self.is_and)
+
+        return bool(result)
+
+
+class SharedRule:
+    """Access rule of a requires string used by several locations or regions.\n
+    Its result is remembered on the CollectionState until the player's items change (see Helpers.get_rule_results),
+    so the locations sharing it only evaluate it once per state change. Only used for requires that don't call functions,
+    as their result can't depend on anything but the player's items.
+    """
+
+    def __init__(self, rule: Callable[[CollectionState], bool], player: int):
+        self.rule = rule
+        self.player = player
+
+    def __call__(self, state: CollectionState) -> bool:
+        results = get_rule_results(state, self.player)
+        result = results.get(self)
+        if result is None:
+            result = results[self] = self.rule(state)
+        return result
+
+
+class ThresholdLadder:
+    """Every location whose requires is only "at least N of the same item or category", sorted by N.\n
+    Finding which of them a state can reach is then a single bisect instead of one rule call per location,
+    eg. world.threshold_ladders[get_category_count_key("Medals")].reachable(state)
+    Only the location's own requires are considered, not the ones of its region.
+    """
+
+    def __init__(self, key: str, player: int):
+        self.key = key
+        self.player = player
+        self.thresholds: list[int] = []
+        self.location_names: list[str] = []
+
+    def add(self, threshold: int, location_name: str):
+        index = bisect.bisect_right(self.thresholds, threshold)
+        self.thresholds.insert(index, threshold)
+        self.location_names.insert(index, location_name)
+
+    def reachable_with(self, count: int) -> list[str]:
+        """Names of the locations that need at most 'count' of this ladder's item or category"""
+        return self.location_names[:bisect.bisect_right(self.thresholds, count)]
+
+    def reachable(self, state: CollectionState) -> list[str]:
+        return self.reachable_with(state.count(self.key, self.player))
+
+    def next_threshold(self, state: CollectionState) -> Optional[int]:
+        """The count needed for the next location of the ladder, or None if all of them can be reached"""
+        index = bisect.bisect_right(self.thresholds, state.count(self.key, self.player))
+        return self.thresholds[index] if index < len(self.thresholds) else None
+
+
+class RuleDependencyGraph:
+    """Reverse index from the state.count keys a rule reads (item names and category keys)
+    to the locations and entrances whose access rules read them.\n
+    Use get_affected_rules(item_name) after collecting or removing an item to only re-test the rules it could have changed.
+    Rules calling functions could depend on anything, so they are always part of the result.
+    """
+
+    def __init__(self, item_name_to_count_keys: dict[str, tuple[tuple[str, int], ...]]):
+        self.item_name_to_count_keys = item_name_to_count_keys
+        self.locations_by_key: dict[str, set[str]] = {}
+        self.entrances_by_key: dict[str, set[str]] = {}
+        self.opaque_locations: set[str] = set()
+        self.opaque_entrances: set[str] = set()
+
+    def add_location(self, location_name: str, dependencies: Optional[set[str]]):
+        self._add(self.locations_by_key, self.opaque_locations, location_name, dependencies)
+
+    def add_entrance(self, entrance_name: str, dependencies: Optional[set[str]]):
+        self._add(self.entrances_by_key, self.opaque_entrances, entrance_name, dependencies)
+
+    def _add(self, by_key: dict[str, set[str]], opaque: set[str], name: str, dependencies: Optional[set[str]]):
+        if dependencies is None:
+            opaque.add(name)
+            return
+
+        for key in dependencies:
+            if key not in by_key:
+                by_key[key] = set()
+            by_key[key].add(name)
+
+    def get_keys(self, item_name: str) -> tuple[str, ...]:
+        """The state.count keys collecting an item changes"""
+        return (item_name, *(key for key, _ in self.item_name_to_count_keys.get(item_name, ())))
+
+    def get_affected_locations(self, item_name: str) -> set[str]:
+        affected = set(self.opaque_locations)
+        for key in self.get_keys(item_name):
+            affected.update(self.locations_by_key.get(key, ()))
+        return affected
+
+    def get_affected_entrances(self, item_name: str) -> set[str]:
+        affected = set(self.opaque_entrances)
+        for key in self.get_keys(item_name):
+            affected.update(self.entrances_by_key.get(key, ()))
+        return affected
+
+    def get_affected_rules(self, item_name: str) -> tuple[set[str], set[str]]:
+        """Return the names of the locations and of the entrances whose rules could have changed
+        after collecting or removing an item named 'item_name'"""
+        return self.get_affected_locations(item_name), self.get_affected_entrances(item_name)
+
+
+class BatchReachability:
+    """Check every location of a player against a state at once, with numpy.\n
+    The requires of most locations are only "at least N of these items or categories", joined by and/or.
+    Those are turned into rows of a requirement matrix (one row per alternative, one column per state.count key),
+    so testing them all is one comparison of the matrix with the state's counts.
+    Locations whose requires call functions or use a 'not', or whose access rule was replaced after set_rules
+    (eg. by a hook), are checked with their access rule instead.
+    Get it with ManualWorld.get_batch_reachability().
+    """
+
+    def __init__(self, world: "ManualWorld", multiworld: MultiWorld, player: int):
+        if np is None:
+            raise ImportError("BatchReachability needs numpy, which isn't installed.")
+
+        self.player = player
+        self.locations = list(multiworld.get_locations(player))
+        self.fallback_locations: list[int] = []
+
+        location_terms: list[tuple[int, list[dict[str, int]]]] = []
+        for index, location in enumerate(self.locations):
+            terms = None
+            if location.name in world.location_rule_nodes:
+                node, rule = world.location_rule_nodes[location.name]
+                # a location without requires keeps the default rule
+                if location.access_rule is (rule or Location.access_rule):
+                    terms = node.get_terms(world) if node is not None else [{}]
+
+            if terms is None:
+                self.fallback_locations.append(index)
+            elif terms:
+                location_terms.append((index, terms))
+            # no terms at all is never reachable, it stays false in the mask
+
+        self.keys = sorted({key for _, terms in location_terms for term in terms for key in term})
+        key_columns = {key: column for column, key in enumerate(self.keys)}
+
+        self.batched_locations = np.array([index for index, _ in location_terms], dtype=np.intp)
+        self.term_starts = np.zeros(len(location_terms), dtype=np.intp)
+        self.requirements = np.zeros((sum(len(terms) for _, terms in location_terms), len(self.keys)), dtype=np.int64)
+        row = 0
+        for position, (_, terms) in enumerate(location_terms):
+            self.term_starts[position] = row
+            for term in terms:
+                for key, count in term.items():
+                    self.requirements[row, key_columns[key]] = count
+                row += 1
+
+        self.regions = list({location.parent_region: None for location in self.locations})
+        region_indexes = {region: index for index, region in enumerate(self.regions)}
+        self.location_regions = np.array([region_indexes[location.parent_region] for location in self.locations], dtype=np.intp)
+
+    def reachable_mask(self, state: CollectionState) -> "np.ndarray":
+        """Return a boolean array, in the order of self.locations, of which locations the state can reach"""
+        counts = state.prog_items[self.player]
+        inventory = np.fromiter((counts.get(key, 0) for key in self.keys), dtype=np.int64, count=len(self.keys))
+
+        mask = np.zeros(len(self.locations), dtype=bool)
+        if len(self.batched_locations):
+            terms_met = (self.requirements <= inventory).all(axis=1)
+            mask[self.batched_locations] = np.logical_or.reduceat(terms_met, self.term_starts)
+
+        regions_reached = np.fromiter((region.can_reach(state) for region in self.regions), dtype=bool, count=len(self.regions))
+        mask &= regions_reached[self.location_regions]
+
+        for index in self.fallback_locations:
+            mask[index] = self.locations[index].can_reach(state)
+        return mask
+
+    def reachable_locations(self, state: CollectionState) -> list[Location]:
+        mask = self.reachable_mask(state)
+        return [location for location, reachable in zip(self.locations, mask) if reachable]
+
+
+class RuleProfiler:
+    """Opt-in profiler of the access rules of a player's locations and entrances.\n
+    Set the MANUAL_PROFILE_RULES environment variable (to anything but 0) before generating to enable it.
+    Every access rule is then wrapped to count its calls, the time spent in it and how often it returned true,
+    and generate_output writes the results, slowest first, next to the other output files.
+    When it isn't enabled no wrapper is installed at all.
+    The time of a rule includes the rules it checks itself, eg. through canReachLocation.
+    """
+    ENVIRONMENT_VARIABLE = "MANUAL_PROFILE_RULES"
+
+    def __init__(self):
+        # "Location name" or "Entrance name" -> [calls, total time, true results]
+        self.stats: dict[str, list] = {}
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        return os.environ.get(cls.ENVIRONMENT_VARIABLE, "0") not in ("", "0")
+
+    def install(self, multiworld: MultiWorld, player: int):
+        """Wrap the rules of the player that aren't wrapped yet, so it can be called again after rules are set again"""
+        for location in multiworld.get_locations(player):
+            if not getattr(location.access_rule, "profiled", False):
+                location.access_rule = self.wrap(f"Location {location.name}", location.access_rule)
+        for entrance in multiworld.get_entrances(player):
+            if not getattr(entrance.access_rule, "profiled", False):
+                entrance.access_rule = self.wrap(f"Entrance {entrance.name}", entrance.access_rule)
+
+    def wrap(self, name: str, rule: Callable[[CollectionState], bool]) -> Callable[[CollectionState], bool]:
+        # a rule that is set again keeps adding to the same stats
+        stats = self.stats.setdefault(name, [0, 0.0, 0])
+
+        def profiled_rule(state: CollectionState) -> bool:
+            start = time.perf_counter()
+            result = rule(state)
+            stats[1] += time.perf_counter() - start
+            stats[0] += 1
+            if result:
+                stats[2] += 1
+            return result
+
+        profiled_rule.profiled = True
+        return profiled_rule
+
+    def write_report(self, path: str):
+        lines = [f"{'Total (ms)':>12} {'Calls':>10} {'Per call (us)':>14} {'True':>7}  Rule"]
+        for name, (calls, total, true_results) in sorted(self.stats.items(), key=lambda stat: stat[1][1], reverse=True):
+            if not calls:
+                continue
+            lines.append(f"{total * 1000:>12.3f} {calls:>10} {total * 1000000 / calls:>14.2f} {true_results / calls:>7.1%}  {name}")
+
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+
+
+def merge_terms(first: dict[str, int], second: dict[str, int]) -> dict[str, int]:
+    """Return the minimum counts needed to have both maps of minimum counts"""
+    merged = dict(first)
+    for key, count in second.items():
+        merged[key] = max(count, merged.get(key, count))
+    return merged
+
+def merge_dependencies(dependencies_list: Iterable[Optional[set[str]]]) -> Optional[set[str]]:
+    """Union of the dependencies of multiple nodes, None if any of them can depend on anything"""
+    merged = set()
+    for dependencies in dependencies_list:
+        if dependencies is None:
+            return None
+        merged.update(dependencies)
+    return merged
+
+def resolve_requires_count(count: int|str, total: int) -> int:
+    """Turn the count of a requires item ('all', 'half', 'N%' or a number) into a number,
+    'total' being the amount of that item (or category) in the pool"""
+    if isinstance(count, int):
+        return count
+    if count == 'all':
+        return total
+    if count == 'half':
+        return int(total / 2)
+    percent = clamp(float(count[:-1]) / 100, 0, 1)
+    return math.ceil(total * percent)
+
+def parse_requires_count(count: str, item_name: str, area_name: str) -> int|str:
+    count = count.strip().lower()
+    if count in ['all', 'half'] or (count.endswith('%') and len(count) > 1):
+        return count
+    try:
+        return int(count)
+    except ValueError as e:
+        raise ValueError(f"Invalid item count `{item_name}` in {area_name}.") from e
+
+def parse_requires_item(item: str, area_name: str) -> RequireNode:
+    """Parse a single |Item:count| or |@Category:count| reference"""
+    is_category = item.startswith('|@')
+    item = item.lstrip('|@$').rstrip('|')
+
+    item_parts = item.split(":")
+    item_name = item
+    item_count = 1
+
+    if len(item_parts) > 1:
+        item_name = item_parts[0].strip()
+        item_count = parse_requires_count(item_parts[1], item_name, area_name)
+
+    if is_category:
+        return RequireCategory(item_name, item_count)
+    return RequireItem(item_name, item_count)
+
+def get_requires_function(func_name: str, area_name: str) -> Callable:
+    """Find a requires function by name, in this file first and then in hooks/Rules.py"""
+    if func_name not in requires_functions:
+        func = globals().get(func_name)
+
+        if func is None:
+            func = getattr(Rules, func_name, None)
+
+        if not callable(func):
+            raise ValueError(f"Invalid function `{func_name}` in {area_name}.")
+
+        requires_functions[func_name] = func
+    return requires_functions[func_name]
+
+def parse_requires_function(func_name: str, func_args: str, area_name: str) -> RequireFunction:
+    """Find the function called by {func_name(func_args)} and convert its arguments"""
+    func = get_requires_function(func_name, area_name)
+
+    args = func_args.split(",")
+    if args == ['']:
+        args.pop()
+
+    args = convert_req_function_args(func, args, area_name)
+    return RequireFunction(func_name, func, args, area_name)
+
+def parse_requires_list(requires: list) -> RequireNode:
+    """Parse a requires in list form into a tree of RequireNode.\n
+    Plain "Item" or "Item:count" entries must all be had, unless one of the lists (or {"or": [...]}) in it
+    is fully had instead, eg. ["A", "B", ["C", "D:2"]] is (A and B) or (C and D:2).
+    """
+    def to_counts(entries: list[str]) -> RequireCounts:
+        item_counts = {}
+        for entry in entries:
+            entry_parts = entry.split(":")
+            item_count = int(entry_parts[1]) if len(entry_parts) > 1 else 1
+            item_counts[entry_parts[0]] = max(item_count, item_counts.get(entry_parts[0], 0))
+        return RequireCounts(item_counts)
+
+    alternatives = []
+    items = []
+    for entry in requires:
+        if isinstance(entry, dict) and isinstance(entry.get("or"), list):
+            alternatives.append(to_counts(entry["or"]))
+        elif isinstance(entry, list):
+            alternatives.append(to_counts(entry))
+        else:
+            items.append(entry)
+
+    # with no plain entries, one of the alternatives is needed
+    if items or not alternatives:
+        alternatives.append(to_counts(items))
+
+    if len(alternatives) == 1:
+        return alternatives[0]
+    return RequireOr(alternatives)
+
+def parse_requires(requires: str, area_name: str) -> RequireNode:
+    """Parse a requires string into a tree of RequireNode, which can then be compiled into an access rule.\n
+    AND and OR have the same precedence and are read left to right, like they always have been in Manual.
+    The result is cached per requires string, so each string (and the function calls in it) is only parsed once.
+    """
+    if requires not in parsed_requires:
+        parsed_requires[requires] = _parse_requires(requires, area_name)
+    return parsed_requires[requires]
+
+def _parse_requires(requires: str, area_name: str) -> RequireNode:
+    functions = []
+    def replace_function(match: re.Match) -> str:
+        functions.append(parse_requires_function(match.group(1), match.group(2), area_name))
+        return FUNCTION_PLACEHOLDER.format(len(functions) - 1)
+
+    requires = requires_function_pattern.sub(replace_function, requires)
+
+    items = []
+    def replace_item(match: re.Match) -> str:
+        item = match.group(0)
+        used_functions = []
+        def renumber_function(function_match: re.Match) -> str:
+            used_functions.append(functions[int(function_match.group(1))])
+            return FUNCTION_PLACEHOLDER.format(len(used_functions) - 1)
+
+        item = re.sub(r'\x00(\d+)\x00', renumber_function, item)
+        if used_functions:
+            items.append(RequireTemplate(item, used_functions, area_name))
+        else:
+            items.append(parse_requires_item(item, area_name))
+        return ITEM_PLACEHOLDER.format(len(items) - 1)
+
+    requires = requires_item_pattern.sub(replace_item, requires)
+
+    tokens = []
+    for match in requires_token_pattern.finditer(requires):
+        if match.group(1) is not None:
+            function = functions[int(match.group(1))]
+            # {ItemValue(Value:count)} reads one total, so it's checked like a category count instead of calling it
+            if function.func is ItemValue:
+                value_name, value_count = parse_item_value(function.args[0])
+                function = RequireValue(value_name, value_count)
+            tokens.append(function)
+        elif match.group(2) is not None:
+            tokens.append(items[int(match.group(2))])
+        elif match.group(0).isdigit():
+            tokens.append(RequireConstant(int(match.group(0)) != 0))
+        else:
+            tokens.append(match.group(0).lower())
+
+    if not tokens:
+        return RequireConstant(True)
+
+    position = 0
+
+    def parse_operand() -> RequireNode:
+        nonlocal position
+        if position >= len(tokens):
+            raise KeyError("Invalid logic format for location/region {}.".format(area_name))
+        token = tokens[position]
+        position += 1
+
+        if token == "!":
+            return RequireNot(parse_operand())
+        if token == "(":
+            node = parse_expression()
+            if position >= len(tokens) or tokens[position] != ")":
+                raise KeyError("Invalid logic format for location/region {}.".format(area_name))
+            position += 1
+            return node
+        if isinstance(token, RequireNode):
+            return token
+        raise KeyError("Invalid logic format for location/region {}.".format(area_name))
+
+    def parse_expression() -> RequireNode:
+        nonlocal position
+        node = parse_operand()
+        while position < len(tokens) and tokens[position] in ["&", "and", "or"]:
+            node_type = RequireOr if tokens[position] == "or" else RequireAnd
+            position += 1
+            operand = parse_operand()
+            if type(node) is node_type:
+                node.children.append(operand)
+            else:
+                node = node_type([node, operand])
+        return node
+
+    node = parse_expression()
+    if position != len(tokens):
+        raise KeyError("Invalid logic format for location/region {}.".format(area_name))
+    return node
+
+def get_generated_rules(world: "ManualWorld", requires: dict[str, str]) -> dict[str, RequireGenerated]:
+    """Return the generated access rules of requires strings, as requires string -> RequireGenerated.\n
+    The requires that don't call functions are written as flat Python functions into a module of the user cache directory,
+    named after a hash of every requires string and category, and that module is simply imported by later generations.
+    The module also keeps the dependencies, threshold, cost and terms of their nodes, and the loaded requires are added to
+    the cache of parse_requires, so those strings aren't parsed at all once the module exists.
+    Requires that can't be written that way aren't in the result and are parsed and compiled from their nodes instead.
+    requires maps each requires string to the name of an area using it, for error messages.
+    """
+    categories = sorted({category for item in world.item_name_to_item.values() for category in item.get("category", [])})
+    data_hash = hashlib.sha256(json.dumps([GENERATED_RULES_VERSION, sorted(requires), categories]).encode("utf-8")).hexdigest()[:16]
+
+    if data_hash not in generated_rules:
+        game_name = re.sub(r'[^\w-]', '_', world.game)
+        path = Utils.cache_path("manual", f"{game_name}_rules_{data_hash}.py")
+        try:
+            if not os.path.exists(path):
+                write_generated_rules(world, requires, path)
+
+            spec = importlib.util.spec_from_file_location(f"manual_generated_rules_{data_hash}", path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            generated_rules[data_hash] = {text: RequireGenerated(*entry) for text, entry in module.RULES.items()}
+        except Exception as e:
+            logging.warning(f"Could not use the generated rules at {path}, the requires will be compiled instead: {e}")
+            generated_rules[data_hash] = {}
+
+    for text, node in generated_rules[data_hash].items():
+        parsed_requires.setdefault(text, node)
+    return generated_rules[data_hash]
+
+def load_generated_rules(world: "ManualWorld"):
+    """Load the generated rules of every requires string of the locations and regions, see get_generated_rules"""
+    get_generated_rules(world, {area["requires"]: area.get("name", f"An area with these parameters: {area}")
+                                for area in [*world.location_table, *regionMap.values()] if area.get("requires") and isinstance(area["requires"], str)})
+
+def write_generated_rules(world: "ManualWorld", requires: dict[str, str], path: str):
+    lines = [f"# Access rules of {world.game}, generated by Manual from its requires. Don't edit, it's regenerated when they change.", ""]
+    entries = []
+    for text in sorted(requires):
+        node = parse_requires(text, requires[text])
+        source = node.to_source(world)
+        if source is None:
+            continue
+
+        # the rule, then what RequireGenerated needs to stand in for the parsed node
+        lines.extend([f"def rule_{len(entries)}(player):", f"    return lambda state: {source}", ""])
+        entry = [source, sorted(node.get_dependencies()), node.get_threshold(), node.get_cost(), node.get_terms(world)]
+        entries.append(f"    {text!r}: (rule_{len(entries)}, {', '.join(repr(value) for value in entry)}),")
+
+    lines.extend(["RULES = {", *entries, "}", ""])
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # written under another name first, so an other generation never imports a half written module
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
+    os.replace(temporary_path, path)
+
+def parse_area_requires(world: "ManualWorld", multiworld: MultiWorld, player: int, area: Optional[dict]) -> Optional[RequireNode]:
+    """Parse the requires of an area (think, location or region) and fold it for this player.
+    Returns None if the area has no requires at all."""
+    # if it's not a usable object of some sort, or it doesn't use the "requires" key, there's nothing to check
+    if not area or not area.get("requires"):
+        return None
+
+    # item access is in list form
+    if not isinstance(area["requires"], str):
+        return parse_requires_list(area["requires"])
+
+    node = parse_requires(area["requires"], area.get("name", f"An area with these parameters: {area}"))
+    return node.fold(world, multiworld, player)
+
+def find_impossible_locations(world: "ManualWorld", multiworld: MultiWorld, player: int, pool: list[Item]) -> list[Location]:
+    """Return the locations of the player whose requires, or the requires of their region, can't be met
+    even with every item of the pool, the starting inventory and the items already placed on the player's locations.\n
+    Only requires made of item and category counts joined by and/or can be proven impossible (see RequireNode.get_terms),
+    any other requires is assumed to be possible.
+    """
+    load_generated_rules(world)
+
+    placed_items = [location.item for location in multiworld.get_filled_locations(player) if location.item and location.item.player == player]
+    items = [*pool, *multiworld.precollected_items[player], *placed_items]
+
+    # the pool isn't in the multiworld yet, so the 'all', 'half' and '%' counts are resolved from the counts
+    # get_item_counts will find once it is; the item counts of the world are left as they were for everything else
+    previous_item_counts = world.item_counts.get(player)
+    world.item_counts[player] = dict(Counter(item.name for item in items))
+    try:
+        return _find_impossible_locations(world, multiworld, player, items)
+    finally:
+        if previous_item_counts is None:
+            world.item_counts.pop(player, None)
+        else:
+            world.item_counts[player] = previous_item_counts
+
+def _find_impossible_locations(world: "ManualWorld", multiworld: MultiWorld, player: int, items: list[Item]) -> list[Location]:
+    # what the state would have with every item collected, see ManualWorld.collect
+    max_counts = Counter()
+    for item in items:
+        if item.advancement:
+            max_counts[item.name] += 1
+            for key, amount in world.item_name_to_count_keys.get(item.name, ()):
+                max_counts[key] += amount
+
+    def is_possible(area: Optional[dict]) -> bool:
+        node = parse_area_requires(world, multiworld, player, area)
+        terms = node.get_terms(world) if node is not None else None
+        if terms is None:
             return True
+        return any(all(max_counts[key] >= count for key, count in term.items()) for term in terms)
 
-        if isinstance(area["requires"], str):
-            return checkRequireStringForArea(state, area)
-        else:  # item access is in dict form
-            return checkRequireDictForArea(state, area)
+    possible_regions = {region: is_possible(regionMap[region]) for region in regionMap.keys()}
+    impossible_locations = []
+    for location in multiworld.get_locations(player):
+        area = world.location_name_to_location.get(location.name)
+        if area is None:
+            continue
+        if not possible_regions.get(area.get("region"), True) or not is_possible(area):
+            impossible_locations.append(location)
+    return impossible_locations
+
+def set_rules(world: "ManualWorld", multiworld: MultiWorld, player: int):
+    # parse the requires of an area (think, location or region) once
+    # returns None if the area has no requires at all
+    # functions marked with @state_independent are called here, once, and replaced by their result
+    def parseRequiresForArea(area: Optional[dict]) -> Optional[RequireNode]:
+        return parse_area_requires(world, multiworld, player, area)
+
+    # return the state.count keys the requires of an area read, None if they could depend on anything
+    def getDependenciesForArea(node: Optional[RequireNode]) -> Optional[set[str]]:
+        if node is None:
+            return set()
+        return node.get_dependencies()
+
+    # return the access rule the requires of an area compiles to
+    # returns None if the area has no requirement at all
+    # areas with the exact same requires share the same rule
+    compiled_requires: dict[str, Callable[[CollectionState], bool]] = {}
+    def compileRequiresForArea(area: Optional[dict], node: Optional[RequireNode]) -> Optional[Callable[[CollectionState], bool]]:
+        if node is None:
+            return None
+
+        requires_key = repr(area["requires"])
+        if requires_key not in compiled_requires:
+            rule = node.compile(world, multiworld, player)
+            # a single item check is already cheaper than looking up a remembered result
+            if node.get_cost() > 1 and node.get_dependencies() is not None:
+                rule = SharedRule(rule, player)
+            compiled_requires[requires_key] = rule
+        return compiled_requires[requires_key]
+
+    # the item pool is final by now, count it again in case an earlier stage asked for the counts of an unfinished one
+    # the 'all', 'half' and '%' counts of the requires are resolved from these counts when they are folded,
+    # see ManualWorld.refresh_item_counts if the pool is changed after this
+    world.get_item_counts(player, reset=True)
+
+    # the requires strings without function calls get their node and rule from the generated rules module, without being parsed
+    load_generated_rules(world)
+
+    region_nodes = {region: parseRequiresForArea(regionMap[region]) for region in regionMap.keys()}
+    region_rules = {region: compileRequiresForArea(regionMap[region], region_nodes[region]) for region in regionMap.keys()}
+    region_dependencies = {region: getDependenciesForArea(region_nodes[region]) for region in regionMap.keys()}
+    world.threshold_ladders = {}
+    # the parsed requires and compiled rule of each location, used by BatchReachability
+    world.location_rule_nodes = {}
+    world.rule_dependencies = RuleDependencyGraph(world.item_name_to_count_keys)
 
     used_location_names = []
     # Region access rules
+    # A region's requires are checked by every entrance leading into it, so being able to reach a region
+    # already means its requires are met and the locations in it don't need to check them again.
+    # This changes what region.can_reach / state.can_reach_region mean: they used to be true once an entrance into the region
+    # was open, its own requires being checked by its exits and locations; they now include the region's requires.
     for region in regionMap.keys():
         used_location_names.extend([l.name for l in multiworld.get_region(region, player).locations])
-        if region != "Menu":
-            for exitRegion in multiworld.get_region(region, player).exits:
-                def fullRegionCheck(state: CollectionState, region=regionMap[region]):
-                    return fullLocationOrRegionCheck(state, region)
-
-                set_rule(multiworld.get_entrance(exitRegion.name, player), fullRegionCheck)
+        if region != "Menu" and region_rules[region] is not None:
+            for entrance in multiworld.get_region(region, player).entrances:
+                set_rule(entrance, region_rules[region])
+                world.rule_dependencies.add_entrance(entrance.name, region_dependencies[region])
 
     # Location access rules
     for location in world.location_table:
@@ -243,38 +1217,46 @@ def set_rules(world: "ManualWorld", multiworld: MultiWorld, player: int):
 
         locFromWorld = multiworld.get_location(location["name"], player)
 
-        locationRegion = regionMap[location["region"]] if "region" in location else None
-
-        if "requires" in location: # Location has requires, check them alongside the region requires
-            def checkBothLocationAndRegion(state: CollectionState, location=location, region=locationRegion):
-                locationCheck = fullLocationOrRegionCheck(state, location)
-                regionCheck = True # default to true unless there's a region with requires
-
-                if region:
-                    regionCheck = fullLocationOrRegionCheck(state, region)
+        locationNode = parseRequiresForArea(location)
+        locationRule = compileRequiresForArea(location, locationNode)
 
-                return locationCheck and regionCheck
+        threshold = locationNode.get_threshold() if locationNode is not None else None
+        if threshold is not None:
+            key, count = threshold
+            if key not in world.threshold_ladders:
+                world.threshold_ladders[key] = ThresholdLadder(key, player)
+            world.threshold_ladders[key].add(count, location["name"])
 
-            set_rule(locFromWorld, checkBothLocationAndRegion)
-        elif "region" in location: # Only region access required, check the location's region's requires
-            def fullRegionCheck(state, region=locationRegion):
-                return fullLocationOrRegionCheck(state, region)
+        world.rule_dependencies.add_location(location["name"], getDependenciesForArea(locationNode))
+        world.location_rule_nodes[location["name"]] = (locationNode, locationRule)
 
-            set_rule(locFromWorld, fullRegionCheck)
-        else: # No location region and no location requires? It's accessible.
-            def allRegionsAccessible(state):
-                return True
+        # The region's requires are already part of reaching the location, see the region access rules above
+        if locationRule is not None:
+            set_rule(locFromWorld, locationRule)
+        # No location requires? It's accessible as soon as its region is, which is the default rule.
 
-            set_rule(locFromWorld, allRegionsAccessible)
+    # Entrances whose requires check if other regions (or locations in them) can be reached are registered as indirect
+    # conditions of those regions, so AP checks them again once those regions are reached instead of caching them as closed
+    for region, node in region_nodes.items():
+        if region == "Menu" or node is None:
+            continue
+        reached_regions = node.get_reached_regions(world, multiworld, player)
+        for entrance in multiworld.get_region(region, player).entrances:
+            for reached_region in reached_regions:
+                multiworld.register_indirect_condition(multiworld.get_region(reached_region, player), entrance)
 
     # Victory requirement
     multiworld.completion_condition[player] = lambda state: state.has("__Victory__", player)
 
-    def convert_req_function_args(func, args: list[str], areaName: str, warn: bool = False):
-        parameters = inspect.signature(func).parameters
+def get_req_function_parameters(func) -> list[tuple[inspect.Parameter, Optional[type], bool]]:
+    """Inspect the signature of a requires function, only the first time it is asked for.\n
+    Returns the parameters a requires string gives a value to, with the type to convert that value to
+    (None if it isn't converted) and if the parameter is Optional
+    """
+    if func not in req_function_parameters:
         knownArguments = ["world", "multiworld", "state", "player"]
-        index = 0
-        for parameter, info in parameters.items():
+        function_parameters = []
+        for parameter, info in inspect.signature(func).parameters.items():
             if parameter in knownArguments:
                 continue
 
@@ -290,100 +1272,91 @@ def set_rules(world: "ManualWorld", multiworld: MultiWorld, player: int):
                     argType = argType.__args__[0]
                 else:
                     #Implementing complex typing is not simple so ill skip it for now
-                    index += 1
-                    continue
+                    argType = None
+
+            function_parameters.append((info, argType, optional))
+        req_function_parameters[func] = function_parameters
+    return req_function_parameters[func]
+
+def convert_req_function_args(func, args: list[str], areaName: str, warn: bool = False) -> list:
+    """Return a copy of args, the arguments of a call to a requires function, converted to the types the function asks for"""
+    args = list(args)
+    index = 0
+    for info, argType, optional in get_req_function_parameters(func):
+        if argType is None:
+            index += 1
+            continue
 
-            try:
-                value = args[index].strip()
+        try:
+            value = args[index].strip()
 
-            except IndexError:
-                if info is not inspect.Parameter.empty:
-                    value = info.default
+        except IndexError:
+            if info is not inspect.Parameter.empty:
+                value = info.default
 
-                else:
-                    raise Exception(f"A call of the {func.__name__} function in '{areaName}'s requirement, asks for a value of type {argType}\nfor its argument '{info.name}' but its missing")
+            else:
+                raise Exception(f"A call of the {func.__name__} function in '{areaName}'s requirement, asks for a value of type {argType}\nfor its argument '{info.name}' but its missing")
 
-            if optional:
-                if isinstance(value, type(None)):
+        if optional:
+            if isinstance(value, type(None)):
+                index += 1
+                continue
+            elif isinstance(value, str):
+                if value.lower() == 'none':
+                    value = None
+                    args[index] = value
                     index += 1
                     continue
-                elif isinstance(value, str):
-                    if value.lower() == 'none':
-                        value = None
-                        args[index] = value
-                        index += 1
-                        continue
 
 
-            if not isinstance(value, argType):
-                if issubclass(argType, bool):
-                    #Special conversion to bool
-                    if value.lower() in ['true', '1']:
-                        value = True
+        if not isinstance(value, argType):
+            if issubclass(argType, bool):
+                #Special conversion to bool
+                if value.lower() in ['true', '1']:
+                    value = True
 
-                    elif value.lower() in ['false', '0']:
-                        value = False
-
-                    else:
-                        value = bool(value)
-                        if warn:
-                        # warning here spam the console if called from rules.py, might be worth to make it a data validation instead
-                            logging.warn(f"A call of the {func.__name__} function in '{areaName}'s requirement, asks for a value of type {argType}\nfor its argument '{info.name}' but an unknown string was passed and thus converted to {value}")
+                elif value.lower() in ['false', '0']:
+                    value = False
 
                 else:
-                    try:
-                        value = argType(value)
+                    value = bool(value)
+                    if warn:
+                    # warning here spam the console if called from rules.py, might be worth to make it a data validation instead
+                        logging.warn(f"A call of the {func.__name__} function in '{areaName}'s requirement, asks for a value of type {argType}\nfor its argument '{info.name}' but an unknown string was passed and thus converted to {value}")
+
+            else:
+                try:
+                    value = argType(value)
 
-                    except ValueError:
-                        raise Exception(f"A call of the {func.__name__} function in '{areaName}'s requirement, asks for a value of type {argType}\nfor its argument '{info.name}' but its value '{value}' cannot be converted to {argType}")
+                except ValueError:
+                    raise Exception(f"A call of the {func.__name__} function in '{areaName}'s requirement, asks for a value of type {argType}\nfor its argument '{info.name}' but its value '{value}' cannot be converted to {argType}")
 
-                args[index] = value
+            args[index] = value
 
-            index += 1
+        index += 1
+
+    return args
 
 def ItemValue(world: World, multiworld: MultiWorld, state: CollectionState, player: int, valueCount: str, skipCache: bool = False):
     """When passed a string with this format: 'valueName:int',
     this function will check if the player has collect at least 'int' valueName worth of items\n
     eg. {ItemValue(Coins:12)} will check if the player has collect at least 12 coins worth of items\n
-    You can add a second string argument to disable creating/checking the cache like this:
-    '{ItemValue(Coins:12,Disable)}' it can be any string you want
+    The total is kept up to date by ManualWorld.collect/remove, so this is a single lookup.
+    A second argument '{ItemValue(Coins:12,Disable)}' is still accepted but no longer does anything, there is no cache to skip
     """
 
+    value_name, requested_count = parse_item_value(valueCount)
+    return state.has(get_item_value_key(value_name), player, requested_count)
+
+def parse_item_value(valueCount: str) -> tuple[str, int]:
+    """Split the 'valueName:int' argument of ItemValue into the value name and the count"""
     valueCount = valueCount.split(":")
     if not len(valueCount) == 2 or not valueCount[1].isnumeric():
         raise Exception(f"ItemValue needs a number after : so it looks something like 'ItemValue({valueCount[0]}:12)'")
-    value_name = valueCount[0].lower().strip()
-    requested_count = int(valueCount[1].strip())
-
-    if not hasattr(world, 'item_values_cache'): #Cache made for optimization purposes
-        world.item_values_cache = {}
-
-    if not world.item_values_cache.get(player, {}):
-        world.item_values_cache[player] = {}
-
-    if not skipCache:
-        if not world.item_values_cache[player].get(value_name, {}):
-            world.item_values_cache[player][value_name] = {
-                'state': {},
-                'count': -1,
-                }
-
-    if (skipCache or world.item_values_cache[player][value_name].get('count', -1) == -1
-            or world.item_values_cache[player][value_name].get('state') != dict(state.prog_items[player])):
-        # Run First Time, if state changed since last check or if skipCache has a value
-        existing_item_values = get_items_with_value(world, multiworld, value_name)
-        total_Count = 0
-        for name, value in existing_item_values.items():
-            count = state.count(name, player)
-            if count > 0:
-                total_Count += count * value
-        if skipCache:
-            return total_Count >= requested_count
-        world.item_values_cache[player][value_name]['count'] = total_Count
-        world.item_values_cache[player][value_name]['state'] = dict(state.prog_items[player])
-    return world.item_values_cache[player][value_name]['count'] >= requested_count
+    return valueCount[0].lower().strip(), int(valueCount[1].strip())
 
 # Two useful functions to make require work if an item is disabled instead of making it inaccessible
+@state_independent
 def OptOne(world: World, multiworld: MultiWorld, state: CollectionState, player: int, item: str, items_counts: Optional[dict] = None):
     """Check if the passed item (with or without ||) is enabled, then this returns |item:count|
     where count is clamped to the maximum number of said item in the itempool.\n
@@ -423,6 +1396,7 @@ def OptOne(world: World, multiworld: MultiWorld, state: CollectionState, player:
         return f"|{item_name}:{item_count}|"
 
 # OptAll check the passed require string and loop every item to check if they're enabled,
+@state_independent
 def OptAll(world: World, multiworld: MultiWorld, state: CollectionState, player: int, requires: str):
     """Check the passed require string and loop every item to check if they're enabled,
     then returns the require string with items counts adjusted using OptOne\n
@@ -449,17 +1423,36 @@ def OptAll(world: World, multiworld: MultiWorld, state: CollectionState, player:
         requires_list = requires_list.replace("{" + function + "(temp)}", "{" + func_name + "(" + functions[func_name] + ")}")
     return requires_list
 
+# The regions a location being reachable depends on: its own, and the ones its requires check in turn
+def get_location_reached_regions(world: "ManualWorld", multiworld: MultiWorld, player: int, location: str) -> set[str]:
+    regions = {multiworld.get_location(location, player).parent_region.name}
+    # locations whose requires check each other would never stop otherwise
+    if (player, location) in locations_being_reached:
+        return regions
+
+    node = world.location_rule_nodes.get(location, (None, None))[0]
+    if node is not None:
+        locations_being_reached.add((player, location))
+        try:
+            regions.update(node.get_reached_regions(world, multiworld, player))
+        finally:
+            locations_being_reached.discard((player, location))
+    return regions
+
 # Rule to expose the can_reach_location core function
+@reaches_regions(get_location_reached_regions)
 def canReachLocation(world: World, multiworld: MultiWorld, state: CollectionState, player: int, location: str):
     """Can the player reach the given location?"""
     if state.can_reach_location(location, player):
         return True
     return False
 
+@state_independent
 def YamlEnabled(world: "ManualWorld", multiworld: MultiWorld, state: CollectionState, player: int, param: str) -> bool:
     """Is a yaml option enabled?"""
     return is_option_enabled(multiworld, player, param)
 
+@state_independent
 def YamlDisabled(world: "ManualWorld", multiworld: MultiWorld, state: CollectionState, player: int, param: str) -> bool:
     """Is a yaml option disabled?"""
     return not is_option_enabled(multiworld, player, param)
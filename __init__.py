@@ -12,22 +12,22 @@ from .Data import item_table, location_table, region_table, category_table, meta
 from .Game import game_name, filler_item_name, starting_items
 from .Meta import world_description, world_webworld, enable_region_diagram
 from .Locations import location_id_to_name, location_name_to_id, location_name_to_location, location_name_groups, victory_names
-from .Items import item_id_to_name, item_name_to_id, item_name_to_item, item_name_groups
+from .Items import item_id_to_name, item_name_to_id, item_name_to_item, item_name_groups, item_name_to_code_and_classification
 from .DataValidation import runGenerationDataValidation, runPreFillDataValidation
 
 from .Regions import create_regions
-from .Items import ManualItem
-from .Rules import set_rules
+from .Items import ManualItem, ManualItemPool
+from .Rules import set_rules, find_impossible_locations, RuleProfiler, BatchReachability
 from .Options import manual_options_data
-from .Helpers import is_item_enabled, get_option_value, get_items_for_player, resolve_yaml_option
+from .Helpers import is_item_enabled, is_option_enabled, get_option_value, get_items_for_player, resolve_yaml_option, get_category_count_key, get_item_value_key, clear_rule_results, is_unchanged_hook
 
-from BaseClasses import ItemClassification, Tutorial, Item
+from BaseClasses import ItemClassification, Tutorial, Item, CollectionState
 from Options import PerGameCommonOptions
 from worlds.AutoWorld import World, WebWorld
 
 from .hooks.World import \
     hook_get_filler_item_name, before_create_regions, after_create_regions, \
-    before_create_items_starting, before_create_items_filler, after_create_items, \
+    before_create_items_all, before_create_items_starting, before_create_items_filler, after_create_items, \
     before_create_item, after_create_item, \
     before_set_rules, after_set_rules, \
     before_generate_basic, after_generate_basic, \
@@ -53,6 +53,13 @@ class ManualWorld(World):
     item_name_to_id = item_name_to_id
     item_name_to_item = item_name_to_item
     item_name_groups = item_name_groups
+    item_name_to_code_and_classification = item_name_to_code_and_classification
+    # create_items_batch skips the item hooks while they're still marked @unchanged_hook, as they are in the template
+    item_hooks_do_nothing = is_unchanged_hook(before_create_item) and is_unchanged_hook(after_create_item)
+    # The prog_items keys each item counts toward when collected and by how much, see collect/remove below
+    item_name_to_count_keys = {name: tuple([(get_category_count_key(category), 1) for category in item.get("category", [])]
+                                           + [(get_item_value_key(value_name), value) for value_name, value in item.get("value", {}).items() if value])
+                               for name, item in item_name_to_item.items()}
 
     filler_item_name = filler_item_name
 
@@ -93,7 +100,9 @@ class ManualWorld(World):
         location_game_complete = self.multiworld.get_location(victory_names[get_option_value(self.multiworld, self.player, 'goal')], self.player)
         location_game_complete.address = None
 
-        for unused_goal in [self.multiworld.get_location(name, self.player) for name in victory_names if name != location_game_complete.name]:
+        # victory locations can be disabled like any other location, so only the created ones are removed
+        unused_goal_names = set(victory_names) - {location_game_complete.name}
+        for unused_goal in [location for location in self.multiworld.get_locations(self.player) if location.name in unused_goal_names]:
             unused_goal.parent_region.locations.remove(unused_goal)
 
         location_game_complete.place_locked_item(
@@ -103,10 +112,12 @@ class ManualWorld(World):
 
     def create_items(self):
         # Generate item pool
-        pool = []
+        pool = ManualItemPool()
         traps = []
         configured_item_names = self.item_id_to_name.copy()
 
+        # How many of each item to create, hooks can change it before any item is created
+        item_config = {}
         for name in configured_item_names.values():
             # victory gets placed via place_locked_item at the victory location in create_regions
             if name == "__Victory__": continue
@@ -123,11 +134,16 @@ class ManualWorld(World):
                 if not is_item_enabled(self.multiworld, self.player, item):
                     item_count = 0
 
+            item_config[name] = item_count
+
+        item_config = before_create_items_all(item_config, self, self.multiworld, self.player)
+
+        for name, item_count in item_config.items():
+            item = self.item_name_to_item[name]
+
             if item_count == 0: continue
 
-            for _ in range(item_count):
-                new_item = self.create_item(name)
-                pool.append(new_item)
+            pool.extend(self.create_items_batch(name, item_count))
 
             if item.get("early"): # Some or all early
                 if isinstance(item["early"],int) or (isinstance(item["early"],str) and item["early"].isnumeric()):
@@ -154,7 +170,7 @@ class ManualWorld(World):
                     raise Exception(f"Item {name}'s 'local_early' has an invalid value of '{item['local_early']}'. \nA boolean or an integer was expected.")
 
 
-        pool = before_create_items_starting(pool, self, self.multiworld, self.player)
+        pool = ManualItemPool.of(before_create_items_starting(pool, self, self.multiworld, self.player))
 
         items_started = []
 
@@ -171,16 +187,16 @@ class ManualWorld(World):
                         continue
 
                 # start with the full pool of items
-                items = pool
+                items = list(pool)
 
                 # if the setting lists specific item names, limit the items to just those
                 if "items" in starting_item_block:
-                    items = [item for item in pool if item.name in starting_item_block["items"]]
+                    items = pool.items_named(starting_item_block["items"])
 
                 # if the setting lists specific item categories, limit the items to ones that have any of those categories
                 if "item_categories" in starting_item_block:
                     items_in_categories = [item["name"] for item in self.item_name_to_item.values() if "category" in item and len(set(starting_item_block["item_categories"]).intersection(item["category"])) > 0]
-                    items = [item for item in pool if item.name in items_in_categories]
+                    items = pool.items_named(items_in_categories)
 
                 self.random.shuffle(items)
 
@@ -195,39 +211,69 @@ class ManualWorld(World):
 
         self.start_inventory = {i.name: items_started.count(i) for i in items_started}
 
-        pool = before_create_items_filler(pool, self, self.multiworld, self.player)
+        pool = ManualItemPool.of(before_create_items_filler(pool, self, self.multiworld, self.player))
+
+        # the pool's progression is final here, so check which locations it can never unlock before fillers are added for them
+        self.impossible_locations = find_impossible_locations(self, self.multiworld, self.player, pool)
+        if self.impossible_locations:
+            remove = is_option_enabled(self.multiworld, self.player, "remove_impossible_locations")
+            logging.warning(f"{self.game} ({self.multiworld.get_player_name(self.player)}): these locations can't be reached with the items of the world"
+                            f"{' and were removed' if remove else ''}: {', '.join(location.name for location in self.impossible_locations)}")
+            if remove:
+                for location in self.impossible_locations:
+                    # the victory location keeps its event, it's up to the goal to be reachable
+                    if location.item is None:
+                        location.parent_region.locations.remove(location)
+                if hasattr(self.multiworld, "clear_location_cache"):
+                    self.multiworld.clear_location_cache()
+
         pool = self.adjust_filler_items(pool, traps)
         pool = after_create_items(pool, self, self.multiworld, self.player)
 
         # need to put all of the items in the pool so we can have a full state for placement
         # then will remove specific item placements below from the overall pool
-        self.multiworld.itempool += pool
+        self.multiworld.itempool += list(pool)
 
     def create_item(self, name: str) -> Item:
         name = before_create_item(name, self, self.multiworld, self.player)
 
-        item = self.item_name_to_item[name]
-        classification = ItemClassification.filler
-
-        if "trap" in item and item["trap"]:
-            classification = ItemClassification.trap
-
-        if "useful" in item and item["useful"]:
-            classification = ItemClassification.useful
-
-        if "progression" in item and item["progression"]:
-            classification = ItemClassification.progression
-
-        if "progression_skip_balancing" in item and item["progression_skip_balancing"]:
-            classification = ItemClassification.progression_skip_balancing
-
-        item_object = ManualItem(name, classification,
-                        self.item_name_to_id[name], player=self.player)
+        code, classification = self.item_name_to_code_and_classification[name]
+        item_object = ManualItem(name, classification, code, player=self.player)
 
         item_object = after_create_item(item_object, self, self.multiworld, self.player)
 
         return item_object
 
+    def create_items_batch(self, name: str, count: int) -> list[Item]:
+        """Create count items of this name, the same as calling create_item count times.
+        When before_create_item and after_create_item are marked @unchanged_hook, the items are made directly."""
+        if not self.item_hooks_do_nothing:
+            return [self.create_item(name) for _ in range(count)]
+
+        code, classification = self.item_name_to_code_and_classification[name]
+        player = self.player
+        return [ManualItem(name, classification, code, player) for _ in range(count)]
+
+    def collect(self, state: CollectionState, item: Item) -> bool:
+        change = super().collect(state, item)
+        if change:
+            # Keep a running count of each category and total of each value,
+            # so category requires and ItemValue don't need to count every item of them
+            for key, amount in self.item_name_to_count_keys.get(item.name, ()):
+                state.prog_items[self.player][key] += amount
+            clear_rule_results(state, self.player)
+        return change
+
+    def remove(self, state: CollectionState, item: Item) -> bool:
+        change = super().remove(state, item)
+        if change:
+            for key, amount in self.item_name_to_count_keys.get(item.name, ()):
+                state.prog_items[self.player][key] -= amount
+                if not state.prog_items[self.player][key]:
+                    del state.prog_items[self.player][key]
+            clear_rule_results(state, self.player)
+        return change
+
     def set_rules(self):
         before_set_rules(self, self.multiworld, self.player)
 
@@ -235,6 +281,12 @@ class ManualWorld(World):
 
         after_set_rules(self, self.multiworld, self.player)
 
+        # Installed last so it also sees the rules changed by the hooks
+        self.rule_profiler = None
+        if RuleProfiler.is_enabled():
+            self.rule_profiler = RuleProfiler()
+            self.rule_profiler.install(self.multiworld, self.player)
+
     def generate_basic(self):
         before_generate_basic(self, self.multiworld, self.player)
 
@@ -334,6 +386,9 @@ class ManualWorld(World):
         with open(os.path.join(output_directory, filename), 'wb') as f:
             f.write(b64encode(bytes(json.dumps(data), 'utf-8')))
 
+        if getattr(self, "rule_profiler", None) is not None:
+            self.rule_profiler.write_report(os.path.join(output_directory, f"{self.multiworld.get_out_file_name_base(self.player)}_rules_profile.txt"))
+
     def write_spoiler(self, spoiler_handle):
         before_write_spoiler(self, self.multiworld, spoiler_handle)
 
@@ -354,6 +409,13 @@ class ManualWorld(World):
     # Non-standard AP world methods
     ###
 
+    def get_batch_reachability(self) -> BatchReachability:
+        """Return the BatchReachability of this world's locations, to check all of them against a state at once.
+        Needs numpy, and is only built the first time it is asked for, after the rules are set."""
+        if getattr(self, "batch_reachability", None) is None:
+            self.batch_reachability = BatchReachability(self, self.multiworld, self.player)
+        return self.batch_reachability
+
     def add_filler_items(self, item_pool, traps):
         Utils.deprecate("Use adjust_filler_items instead.")
         return self.adjust_filler_items(item_pool, traps)
@@ -409,6 +471,19 @@ class ManualWorld(World):
             self.item_counts[player] = {i.name: real_pool.count(i) for i in real_pool}
         return self.item_counts.get(player)
 
+    def refresh_item_counts(self):
+        """Call this after changing the item pool once the rules are set, eg. in a generate_basic hook.\n
+        The 'all', 'half' and '%' counts of the requires, and the results of OptOne/OptAll, are resolved from the item counts
+        when the rules are set, so this counts the items again and sets Manual's rules again with the new counts.
+        The before_set_rules/after_set_rules hooks aren't called again, so a rule changed by after_set_rules
+        on a location or region with requires is replaced by Manual's, change it again after calling this.
+        """
+        self.get_item_counts(reset=True)
+        self.batch_reachability = None
+        set_rules(self, self.multiworld, self.player)
+        if self.rule_profiler is not None:
+            self.rule_profiler.install(self.multiworld, self.player)
+
     def client_data(self):
         return {
             "game": self.game,
@@ -1,12 +1,166 @@
 import csv
 import pkgutil
 
+# The most medals a seed can require, and the categories of the Gather and Goal locations made for each count up to it
+MAX_MEDALS = 500
+GATHER_CATEGORY = "((~Objective~))"
+GOAL_CATEGORY = "((~Goal~))"
+
+# The Medal items bigger than one Medal, see the medal_bundle_size option; each is worth its size in the Medals value
+MEDAL_BUNDLE_SIZES = [5, 10, 25]
+MEDAL_VALUE = "Medals"
+
+def get_medal_item_name(size: int) -> str:
+    return "Medal" if size == 1 else f"Medal x{size}"
+
+def get_gather_location_name(medals: int) -> str:
+    return "Gather 1 Medal" if medals == 1 else f"Gather {medals} Medals"
+
+def get_goal_location_name(medals: int) -> str:
+    return f"Goal ({get_gather_location_name(medals)})"
+
+# The number of checks each hero elimination, mastery course and deathmatch mode has in locations.csv
+MAX_CHECKS = 5
+MASTERY_COURSES = ("Recruit", "Agent", "Veteran")
+DEATHMATCH_MODES = ("Solo", "Team")
+
+class Hero:
+    """One hero, with the names of its items and locations made once. Check i of a list is at index i - 1,
+    so list[amount:] are the checks past the first amount."""
+
+    def __init__(self, name: str, role: str, has_mastery: bool):
+        self.name = name
+        self.role = role
+        self.elimination_locations = tuple(f"{name} - Get Eliminations ({i})" for i in range(1, MAX_CHECKS + 1))
+        self.mastery_item = f"Hero Mastery - {name}" if has_mastery else None
+        self.mastery_locations = {
+            course: tuple(f"Hero Mastery - {name} - {course} - Check {i}" for i in range(1, MAX_CHECKS + 1))
+            for course in MASTERY_COURSES
+        } if has_mastery else {}
+
+    def get_mastery_locations(self, first_removed_check: int = 1) -> list[str]:
+        """The mastery locations of every course, from this check on"""
+        return [location for locations in self.mastery_locations.values() for location in locations[first_removed_check - 1:]]
+
+class HeroRole:
+    """A role and the options choosing which of its heroes are in a seed"""
+
+    def __init__(self, name: str, heroes: tuple[str, ...]):
+        self.name = name
+        self.heroes = heroes
+        self.key = name.lower()
+        self.include_option = f"include_{self.key}_heroes"
+        self.available_option = f"available_{self.key}_heroes"
+        self.amount_option = f"{self.key}_heroes_amount"
+
+class HeroCatalog:
+    """Every hero of the game by role, built once from the lists below and shared by the options, the medal count
+    and the pruning of items and locations in World.py. Nothing in it is changed after it's built."""
+
+    def __init__(self, roles: dict[str, list[str]], mastery_heroes: list[str]):
+        self.roles = tuple(HeroRole(role, tuple(heroes)) for role, heroes in roles.items())
+        self.mastery_heroes = tuple(mastery_heroes)
+        self.heroes = {
+            hero_name: Hero(hero_name, role.name, hero_name in self.mastery_heroes)
+            for role in self.roles for hero_name in role.heroes
+        }
+        self.deathmatch_locations = {
+            mode: tuple(f"{mode} Deathmatch - Check {i}" for i in range(1, MAX_CHECKS + 1))
+            for mode in DEATHMATCH_MODES
+        }
+
+    def get_role(self, name: str) -> HeroRole:
+        return next(role for role in self.roles if role.name == name)
+
+HERO_CATALOG = HeroCatalog({
+    "Tank": [
+        "DVa",
+        "Doomfist",
+        "Hazard",
+        "Junker Queen",
+        "Mauga",
+        "Orisa",
+        "Ramattra",
+        "Reinhardt",
+        "Roadhog",
+        "Sigma",
+        "Winston",
+        "Wrecking Ball",
+        "Zarya"
+    ],
+    "Damage": [
+        "Ashe",
+        "Bastion",
+        "Cassidy",
+        "Echo",
+        "Freja",
+        "Genji",
+        "Hanzo",
+        "Junkrat",
+        "Mei",
+        "Pharah",
+        "Reaper",
+        "Sojourn",
+        "Soldier 76",
+        "Sombra",
+        "Symmetra",
+        "Torbjorn",
+        "Tracer",
+        "Venture",
+        "Widowmaker"
+    ],
+    "Support": [
+        "Ana",
+        "Baptiste",
+        "Brigitte",
+        "Illari",
+        "Juno",
+        "Kiriko",
+        "Lifeweaver",
+        "Lucio",
+        "Mercy",
+        "Moira",
+        "Zenyatta"
+    ],
+}, mastery_heroes=[
+    "Mercy",
+    "Reinhardt",
+    "Tracer",
+    "Sojourn",
+    "Winston",
+    "DVa",
+    "Echo",
+    "Genji",
+    "Lucio",
+    "Mei",
+    "Soldier 76",
+    "Kiriko",
+    "Cassidy",
+    "Brigitte"
+])
+
 # called after the game.json file has been loaded
 def after_load_game_file(game_table: dict) -> dict:
     return game_table
 # called after the items.json file has been loaded, before any item loading or processing has occurred
 # if you need access to the items after processing to add ids, etc., you should use the hooks in World.py
 def after_load_item_file(item_table: list) -> list:
+    # Items.py gives the filler item the id following the last item, so it's added before the medal bundles
+    # to keep the id it had without them. Game.py can be imported by now, Data.py has already loaded game.json.
+    from ..Game import filler_item_name
+    item_table.append({
+        "name": filler_item_name
+    })
+
+    # None of them is created unless the medal_bundle_size option asks for it, see before_create_items_all in World.py
+    for size in MEDAL_BUNDLE_SIZES:
+        item_table.append({
+            "count": 0,
+            "name": get_medal_item_name(size),
+            "category": ["Medals"],
+            "value": {MEDAL_VALUE: size},
+            "progression": True
+        })
     return item_table
 
 # NOTE: Progressive items are not currently supported in Manual. Once they are,
@@ -17,32 +171,23 @@ def after_load_progressive_item_file(progressive_item_table: list) -> list:
 # called after the locations.json file has been loaded, before any location loading or processing has occurred
 # if you need access to the locations after processing to add ids, etc., you should use the hooks in World.py
 def after_load_location_file(location_table: list) -> list:
-    location = {}
-    location["name"] = "Gather 1 Medal"
-    location["category"] = ["((~Objective~))"]
-    location["requires"] = "|@Medals:1|"
-    location_table.append(location)
-    for i in range(2, 501):
-        location = {}
-        location["name"] = f"Gather {i} Medals"
-        location["category"] = ["((~Objective~))"]
-        location["requires"] = f"|@Medals:{i}|"
-        location_table.append(location)
+    # Every medal count a seed can require gets a Gather and a Goal location, so their ids never change,
+    # but only the two matching the seed's count are created, see before_is_location_enabled in Helpers.py
+    for medals in range(1, MAX_MEDALS + 1):
+        location_table.append({
+            "name": get_gather_location_name(medals),
+            "category": [GATHER_CATEGORY],
+            "requires": f"{{ItemValue({MEDAL_VALUE}:{medals})}}"
+        })
+
+    for medals in range(1, MAX_MEDALS + 1):
+        location_table.append({
+            "name": get_goal_location_name(medals),
+            "category": [GOAL_CATEGORY],
+            "requires": f"{{ItemValue({MEDAL_VALUE}:{medals})}}",
+            "victory": True
+        })
 
-    location = {}
-    location["name"] = "Goal (Gather 1 Medal)"
-    location["category"] = ["((~Goal~))"]
-    location["requires"] = "|@Medals:1|"
-    location["victory"] = True
-    location_table.append(location)
-    for i in range(2, 501):
-        location = {}
-        location["name"] = f"Goal (Gather {i} Medals)"
-        location["category"] = ["((~Goal~))"]
-        location["requires"] = f"|@Medals:{i}|"
-        location["victory"] = True
-        location_table.append(location)
-    
     csvFile = csv.DictReader(pkgutil.get_data(__name__, "locations.csv").decode().splitlines(), delimiter=',')
     for line in csvFile:
         if line["name"] == "":
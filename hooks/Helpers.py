@@ -2,6 +2,7 @@ from typing import Optional
 from BaseClasses import MultiWorld
 from ..Locations import ManualLocation
 from ..Items import ManualItem
+from .Data import GATHER_CATEGORY, GOAL_CATEGORY, get_gather_location_name, get_goal_location_name
 
 
 # Use this if you want to override the default behavior of is_option_enabled
@@ -17,4 +18,12 @@ def before_is_item_enabled(multiworld: MultiWorld, player: int, item: ManualItem
 # Use this if you want to override the default behavior of is_option_enabled
 # Return True to enable the location, False to disable it, or None to use the default behavior
 def before_is_location_enabled(multiworld: MultiWorld, player: int, location: ManualLocation) -> Optional[bool]:
+    # Only the Gather and Goal locations of the medal count picked in before_create_regions are created
+    required_medals = getattr(multiworld.worlds[player], "required_medals", None)
+    if required_medals is not None:
+        categories = location.get("category", [])
+        if GATHER_CATEGORY in categories:
+            return location["name"] == get_gather_location_name(required_medals)
+        if GOAL_CATEGORY in categories:
+            return location["name"] == get_goal_location_name(required_medals)
     return None
@@ -3,79 +3,20 @@ from Options import FreeText, NumericOption, Toggle, DefaultOnToggle, Choice, Te
 
 # These helper methods allow you to determine if an option has been set, or what its value is, for any player in the multiworld
 from ..Helpers import is_option_enabled, get_option_value
+from .Data import HERO_CATALOG
 
 
-TANK_HERO_LIST = [
-    "DVa",
-    "Doomfist",
-    "Hazard",
-    "Junker Queen",
-    "Mauga",
-    "Orisa",
-    "Ramattra",
-    "Reinhardt",
-    "Roadhog",
-    "Sigma",
-    "Winston",
-    "Wrecking Ball",
-    "Zarya"
-]
+# The heroes of each role are listed once, in hooks/Data.py
+TANK_HERO_LIST = list(HERO_CATALOG.get_role("Tank").heroes)
 TANK_HERO_AMOUNT = len(TANK_HERO_LIST)
 
-DAMAGE_HERO_LIST = [
-    "Ashe",
-    "Bastion",
-    "Cassidy",
-    "Echo",
-    "Freja",
-    "Genji",
-    "Hanzo",
-    "Junkrat",
-    "Mei",
-    "Pharah",
-    "Reaper",
-    "Sojourn",
-    "Soldier 76",
-    "Sombra",
-    "Symmetra",
-    "Torbjorn",
-    "Tracer",
-    "Venture",
-    "Widowmaker"
-]
+DAMAGE_HERO_LIST = list(HERO_CATALOG.get_role("Damage").heroes)
 DAMAGE_HERO_AMOUNT = len(DAMAGE_HERO_LIST)
 
-SUPPORT_HERO_LIST = [
-    "Ana",
-    "Baptiste",
-    "Brigitte",
-    "Illari",
-    "Juno",
-    "Kiriko",
-    "Lifeweaver",
-    "Lucio",
-    "Mercy",
-    "Moira",
-    "Zenyatta"
-]
+SUPPORT_HERO_LIST = list(HERO_CATALOG.get_role("Support").heroes)
 SUPPORT_HERO_AMOUNT = len(SUPPORT_HERO_LIST)
 
-HERO_MASTERY_LIST = [
-    "Mercy",
-    "Reinhardt",
-    "Tracer",
-    "Sojourn",
-    "Winston",
-    "DVa",
-    "Echo",
-    "Genji",
-    "Lucio",
-    "Mei",
-    "Soldier 76",
-    "Kiriko",
-    "Cassidy",
-    "Brigitte"
-]
+HERO_MASTERY_LIST = list(HERO_CATALOG.mastery_heroes)
 HERO_MASTERY_AMOUNT = len(HERO_MASTERY_LIST)
 
 ####################################################################
@@ -108,6 +49,21 @@ class RequiredMedalPercentage(Range):
     range_end = 100
     default = 70
 
+class MedalBundleSize(Choice):
+    """
+    Choose how many Medals each Medal item is worth.
+
+    Single: every Medal is its own item.
+    Bundles of 5/10/25: Medals come in "Medal x5", "Medal x10" or "Medal x25" items, with single Medals for what's left.
+    Bigger bundles make for fewer items to find (and a faster generation), but each one is a bigger step toward the goal.
+    """
+    display_name = "Medal Bundle Size"
+    option_single = 1
+    option_bundles_of_5 = 5
+    option_bundles_of_10 = 10
+    option_bundles_of_25 = 25
+    default = 1
+
 class EnableHeroEliminationChecks(DefaultOnToggle):
     """
     Enable whether getting Eliminations with specific heroes are included in the randomizer.
@@ -306,6 +262,7 @@ class DeathmatchCheckAmount(Range):
 # This is called before any manual options are defined, in case you want to define your own with a clean slate or let Manual define over them
 def before_options_defined(options: dict) -> dict:
     options["required_medal_percentage"] = RequiredMedalPercentage
+    options["medal_bundle_size"]         = MedalBundleSize  #Choice
 
     options["starting_hero_number"]     = StartingHeroNumber
 
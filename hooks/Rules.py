@@ -1,6 +1,6 @@
 from typing import Optional
 from worlds.AutoWorld import World
-from ..Helpers import clamp, get_items_with_value, get_option_value
+from ..Helpers import clamp, get_items_with_value, get_option_value, state_independent
 from BaseClasses import MultiWorld, CollectionState
 
 import re
@@ -24,10 +24,14 @@ def anyClassLevel(world: World, multiworld: MultiWorld, state: CollectionState,
     return False
 
 # You can also return a string from your function, and it will be evaluated as a requires string.
+# If your function doesn't use the state (only options or the item pool), mark it with @state_independent
+# so it is only called once when the rules are set, instead of on every access check.
+@state_independent
 def requiresMelee(world: World, multiworld: MultiWorld, state: CollectionState, player: int):
     """Returns a requires string that checks if the player has unlocked the tank."""
     return "|Figher Level:15| or |Black Belt Level:15| or |Thief Level:15|"
 
+@state_independent
 def setHeroMasteryRequirement(world: World, multiworld: MultiWorld, state: CollectionState, player: int, progressive_num: str):
     mastery_choice = get_option_value(multiworld, player, "include_hero_masteries")
 
@@ -4,20 +4,28 @@ from worlds.AutoWorld import World
 from BaseClasses import MultiWorld, CollectionState
 
 # Object classes from Manual -- extending AP core -- representing items and locations that are used in generation
-from ..Items import ManualItem
+from ..Items import ManualItem, ManualItemPool
 from ..Locations import ManualLocation
 
 # Raw JSON data from the Manual apworld, respectively:
 #          data/game.json, data/items.json, data/locations.json, data/regions.json
 #
 from ..Data import game_table, item_table, location_table, region_table
+from .Options import before_options_defined
+from .Data import get_gather_location_name, get_goal_location_name, get_medal_item_name, MEDAL_BUNDLE_SIZES, HERO_CATALOG, MASTERY_COURSES
 
 # These helper methods allow you to determine if an option has been set, or what its value is, for any player in the multiworld
-from ..Helpers import is_option_enabled, get_option_value
+from ..Helpers import is_option_enabled, get_option_value, unchanged_hook
 
 # calling logging.info("message") anywhere below in this file will output the message to both console and log file
 import logging
 
+# numpy is only needed by get_medal_budget_grid
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 ########################################################################################
 ## Order of method calls when the world generates:
 ##    1. create_regions - Creates regions and locations
@@ -32,89 +40,138 @@ import logging
 
 final_includes_ow2 = {}
 
-def manual_overwatch2_define_max_medals(multiworld: MultiWorld, player: int, print_log: bool):
-    TANK_HERO_AMOUNT = 13
-    DAMAGE_HERO_AMOUNT = 19
-    SUPPORT_HERO_AMOUNT = 11
-    HERO_MASTERY_AMOUNT = 14
-
-    enable_tank_heroes = get_option_value(multiworld, player, "include_tank_heroes")
-    aux_tank_amount = len(get_option_value(multiworld, player, "available_tank_heroes"))
-    if aux_tank_amount == 0: aux_tank_amount = TANK_HERO_AMOUNT
-    tank_amount = min(get_option_value(multiworld, player, "tank_heroes_amount"), aux_tank_amount) if enable_tank_heroes else 0
-
-    enable_damage_heroes = get_option_value(multiworld, player, "include_damage_heroes")
-    aux_damage_amount = len(get_option_value(multiworld, player, "available_damage_heroes"))
-    if aux_damage_amount == 0: aux_damage_amount = DAMAGE_HERO_AMOUNT
-    damage_amount = min(get_option_value(multiworld, player, "damage_heroes_amount"), aux_damage_amount) if enable_damage_heroes else 0
-
-    enable_support_heroes = get_option_value(multiworld, player, "include_support_heroes")
-    aux_support_amount = len(get_option_value(multiworld, player, "available_support_heroes"))
-    if aux_support_amount == 0: aux_support_amount = SUPPORT_HERO_AMOUNT
-    support_amount = min(get_option_value(multiworld, player, "support_heroes_amount"), aux_support_amount) if enable_support_heroes else 0
-
-    total_hero_amount = tank_amount + damage_amount + support_amount
-    ITE_heroes = total_hero_amount
-    
-    enable_hero_ko = get_option_value(multiworld, player, "enable_hero_elimination_checks")
-    hero_ko_amount = get_option_value(multiworld, player, "hero_elimination_check_amount")
-    LOC_hero_ko = hero_ko_amount*total_hero_amount if enable_hero_ko else 0
-    
-    enable_mastery = get_option_value(multiworld, player, "include_hero_masteries")
-    mastery_checks = get_option_value(multiworld, player, "hero_mastery_check_amount")
-    aux_mastery_amount = len(get_option_value(multiworld, player, "available_hero_masteries"))
-    if aux_mastery_amount == 0: aux_mastery_amount = HERO_MASTERY_AMOUNT
-    mastery_amount = min(get_option_value(multiworld, player, "hero_masteries_amount"), aux_mastery_amount) if enable_mastery else 0
-    LOC_mastery = mastery_amount * mastery_checks * 3 if enable_mastery else 0
-    if enable_mastery == 1:
-        ITE_mastery = 3 * mastery_amount
-    elif enable_mastery == 2:
-        ITE_mastery = mastery_amount
-    else:
-        ITE_mastery = 0
-    
-    enable_deathmatch = get_option_value(multiworld, player, "include_deathmatch_checks")
-    deathmatch_checks = get_option_value(multiworld, player, "deathmatch_check_amount")
-    if ((enable_deathmatch == 1) or (enable_deathmatch == 2)):
-        ITE_deathmatch = 1
-        LOC_deathmatch = deathmatch_checks
-    elif enable_deathmatch == 3:
-        ITE_deathmatch = 2
-        LOC_deathmatch = 2*deathmatch_checks
+# The options the medal budget is counted from. The available_* ones are counted by how many heroes they list
+MEDAL_BUDGET_OPTIONS = [
+    *(option for role in HERO_CATALOG.roles for option in (role.include_option, role.available_option, role.amount_option)),
+    "enable_hero_elimination_checks", "hero_elimination_check_amount",
+    "include_hero_masteries", "available_hero_masteries", "hero_masteries_amount", "hero_mastery_check_amount",
+    "include_deathmatch_checks", "deathmatch_check_amount",
+    "required_medal_percentage"
+]
+MEDAL_BUDGET_LIST_OPTIONS = [option for option in MEDAL_BUDGET_OPTIONS if option.startswith("available_")]
+WIN_LOCATION_AMOUNT = 18
+
+def count_medal_budget(values: dict, xp = None) -> dict:
+    """Count the heroes, items and locations of a seed from its option values, and so its max and required medals.
+    With xp=numpy, the values can be arrays and every count is an array of the same shape."""
+    if xp is None:
+        minimum, where, rint = min, (lambda condition, a, b: a if condition else b), round
     else:
-        ITE_deathmatch = 0
-        LOC_deathmatch = 0
-
-    LOC_wins = 18
-
-    ITE_total =            ITE_heroes  + ITE_mastery + ITE_deathmatch
-    LOC_total = LOC_wins + LOC_hero_ko + LOC_mastery + LOC_deathmatch
-
-    if print_log:
-        logging.info(f"Manual Overwatch 2 - Medal Count for SlotID {player}:")
-        logging.info(f"  HERO AND MASTERY AMOUNT:")
-        logging.info(f"  - Tank:    {tank_amount:02d}")
-        logging.info(f"  - Damage:  {damage_amount:02d}")
-        logging.info(f"  - Support: {support_amount:02d}")
-        logging.info(f"  - Mastery: {mastery_amount:02d}")
-        logging.info("")
-        logging.info(f"  ITEMS:")
-        logging.info(f"  - Heroes:     {ITE_heroes}")
-        logging.info(f"  - Masteries:  {ITE_mastery:02d}")
-        logging.info(f"  - Deathmatch: {ITE_deathmatch:02d}")
-        logging.info(f"  - TOTAL:      {ITE_total:02d}")
-        logging.info("")
-        logging.info(f"  LOCATIONS:")
-        logging.info(f"  - Generic wins: {LOC_wins:02d}")
-        logging.info(f"  - Eliminations: {LOC_hero_ko:02d}")
-        logging.info(f"  - Masteries:    {LOC_mastery:02d}")
-        logging.info(f"  - Deathmatch:   {LOC_deathmatch:02d}")
-        logging.info(f"  - TOTAL:        {LOC_total:02d}")
-        logging.info("")
-        logging.info(f"  MAX MEDALS: {LOC_total} - {ITE_total} = {LOC_total - ITE_total}")
+        minimum, where, rint = xp.minimum, xp.where, xp.rint
+
+    counts = {}
+    # An empty list of available heroes is the same as all of them
+    for role in HERO_CATALOG.roles:
+        available_amount = where(values[role.available_option] == 0, len(role.heroes), values[role.available_option])
+        counts[f"{role.key}_amount"] = where(values[role.include_option], minimum(values[role.amount_option], available_amount), 0)
+    available_mastery_amount = where(values["available_hero_masteries"] == 0, len(HERO_CATALOG.mastery_heroes), values["available_hero_masteries"])
+    mastery_mode = values["include_hero_masteries"]
+    counts["mastery_amount"] = where(mastery_mode, minimum(values["hero_masteries_amount"], available_mastery_amount), 0)
+    hero_amount = sum(counts[f"{role.key}_amount"] for role in HERO_CATALOG.roles)
+
+    # 1 is solo only, 2 is team only and 3 is both
+    deathmatch_mode = values["include_deathmatch_checks"]
+    deathmatch_amount = where(deathmatch_mode == 3, 2, where((deathmatch_mode == 1) | (deathmatch_mode == 2), 1, 0))
+
+    counts["hero_items"] = hero_amount
+    counts["mastery_items"] = where(mastery_mode == 1, len(MASTERY_COURSES) * counts["mastery_amount"], where(mastery_mode == 2, counts["mastery_amount"], 0))
+    counts["deathmatch_items"] = deathmatch_amount
+    counts["total_items"] = counts["hero_items"] + counts["mastery_items"] + counts["deathmatch_items"]
+
+    counts["win_locations"] = WIN_LOCATION_AMOUNT
+    counts["elimination_locations"] = where(values["enable_hero_elimination_checks"], values["hero_elimination_check_amount"] * hero_amount, 0)
+    counts["mastery_locations"] = counts["mastery_amount"] * values["hero_mastery_check_amount"] * len(MASTERY_COURSES)
+    counts["deathmatch_locations"] = deathmatch_amount * values["deathmatch_check_amount"]
+    counts["total_locations"] = counts["win_locations"] + counts["elimination_locations"] + counts["mastery_locations"] + counts["deathmatch_locations"]
+
+    counts["max_medals"] = counts["total_locations"] - counts["total_items"]
+    required_medals = rint(counts["max_medals"] * values["required_medal_percentage"] / 100)
+    counts["required_medals"] = where(required_medals == 0, 1, required_medals)
+    return counts
+
+class MedalBudget:
+    """How many medals a player's seed has room for and needs, with the breakdown of its heroes, items and locations.
+    Counted once per world from its options, get it with get_medal_budget(world)."""
+
+    def __init__(self, world: World):
+        multiworld = world.multiworld
+        self.player = world.player
+
+        values = {option: get_option_value(multiworld, self.player, option) for option in MEDAL_BUDGET_OPTIONS}
+        for option in MEDAL_BUDGET_LIST_OPTIONS:
+            values[option] = len(values[option])
+        self.counts = count_medal_budget(values)
+
+        self.max_medals = self.counts["max_medals"]
+        self.required_medals = self.counts["required_medals"]
+        self.goal_index = world.victory_names.index(get_goal_location_name(self.required_medals))
+
+        # How many of each Medal item make up the medals, in bundles of the medal_bundle_size option and single Medals for the rest
+        bundle_size = get_option_value(multiworld, self.player, "medal_bundle_size")
+        medals = self.max_medals
+        self.medal_items = {get_medal_item_name(size): 0 for size in MEDAL_BUNDLE_SIZES}
+        if bundle_size > 1:
+            self.medal_items[get_medal_item_name(bundle_size)] = medals // bundle_size
+            medals %= bundle_size
+        self.medal_items[get_medal_item_name(1)] = medals
+
+    def get_report(self) -> list[str]:
+        counts = self.counts
+        return [
+            f"Manual Overwatch 2 - Medal Count for SlotID {self.player}:",
+            f"  HERO AND MASTERY AMOUNT:",
+            f"  - Tank:    {counts['tank_amount']:02d}",
+            f"  - Damage:  {counts['damage_amount']:02d}",
+            f"  - Support: {counts['support_amount']:02d}",
+            f"  - Mastery: {counts['mastery_amount']:02d}",
+            "",
+            f"  ITEMS:",
+            f"  - Heroes:     {counts['hero_items']}",
+            f"  - Masteries:  {counts['mastery_items']:02d}",
+            f"  - Deathmatch: {counts['deathmatch_items']:02d}",
+            f"  - TOTAL:      {counts['total_items']:02d}",
+            "",
+            f"  LOCATIONS:",
+            f"  - Generic wins: {counts['win_locations']:02d}",
+            f"  - Eliminations: {counts['elimination_locations']:02d}",
+            f"  - Masteries:    {counts['mastery_locations']:02d}",
+            f"  - Deathmatch:   {counts['deathmatch_locations']:02d}",
+            f"  - TOTAL:        {counts['total_locations']:02d}",
+            "",
+            f"  MAX MEDALS: {counts['total_locations']} - {counts['total_items']} = {self.max_medals}",
+            f"  REQUIRED MEDALS: {self.required_medals}",
+            f"  MEDAL ITEMS: {', '.join(f'{count} {name}' for name, count in self.medal_items.items() if count)}",
+        ]
+
+    def log(self):
+        for line in self.get_report():
+            logging.info(line)
         logging.info(f"------------------------------------------------------")
-    
-    return LOC_total - ITE_total
+
+def get_medal_budget(world: World) -> MedalBudget:
+    if getattr(world, "medal_budget", None) is None:
+        world.medal_budget = MedalBudget(world)
+    return world.medal_budget
+
+def get_medal_budget_grid(**option_values) -> dict:
+    """Count the medal budget of every combination of the given option values at once, eg. to check presets:
+    get_medal_budget_grid(tank_heroes_amount=range(1, 14), hero_elimination_check_amount=[1, 3, 5])["max_medals"]
+    is an array of 13x3 max medals. The options not given keep their default, available_* values are hero counts.
+    Needs numpy."""
+    if np is None:
+        raise ImportError("get_medal_budget_grid needs numpy, which isn't installed.")
+
+    option_classes = before_options_defined({})
+    values = {}
+    for option in MEDAL_BUDGET_OPTIONS:
+        default = option_classes[option].default
+        values[option] = len(default) if option in MEDAL_BUDGET_LIST_OPTIONS else int(default)
+
+    grid = np.meshgrid(*(np.asarray(list(option_range), dtype=np.int64) for option_range in option_values.values()), indexing="ij")
+    values.update(zip(option_values.keys(), grid))
+    counts = count_medal_budget(values, np)
+    shape = grid[0].shape if grid else ()
+    return {name: np.broadcast_to(np.asarray(count, dtype=np.int64), shape) for name, count in counts.items()}
 
 # Use this function to change the valid filler items to be created to replace item links or starting items.
 # Default value is the `filler_item_name` from game.json
@@ -123,18 +180,13 @@ def hook_get_filler_item_name(world: World, multiworld: MultiWorld, player: int)
 
 # Called before regions and locations are created. Not clear why you'd want this, but it's here. Victory location is included, but Victory event is not placed yet.
 def before_create_regions(world: World, multiworld: MultiWorld, player: int):
-    max_medals = manual_overwatch2_define_max_medals(multiworld, player, True)
-    multiplier = get_option_value(multiworld, player, "required_medal_percentage")
-    medals = round(max_medals * multiplier / 100)
-    if medals == 0:
-        medals = 1
-    if medals == 1:
-        goal_index = world.victory_names.index(f"Goal (Gather 1 Medal)")
-    else:
-        goal_index = world.victory_names.index(f"Goal (Gather {medals} Medals)")
+    medal_budget = get_medal_budget(world)
+    medal_budget.log()
 
     # Set goal location
-    world.options.goal.value = goal_index
+    world.options.goal.value = medal_budget.goal_index
+    # Only the Gather and Goal locations of this count get created, see before_is_location_enabled in Helpers.py
+    world.required_medals = medal_budget.required_medals
 
 # Called after regions and locations are created, in case you want to see or modify that information. Victory location is included.
 def after_create_regions(world: World, multiworld: MultiWorld, player: int):
@@ -151,8 +203,14 @@ def after_create_regions(world: World, multiworld: MultiWorld, player: int):
     if hasattr(multiworld, "clear_location_cache"):
         multiworld.clear_location_cache()
 
+# The number of each item to create, before any item is created. Change a count here instead of creating the items and removing them later
+def before_create_items_all(item_config: dict[str, int], world: World, multiworld: MultiWorld, player: int) -> dict[str, int]:
+    # Only create the medals the locations of this seed leave room for, bundled if the medal_bundle_size option asks for it
+    item_config.update(get_medal_budget(world).medal_items)
+    return item_config
+
 # The item pool before starting items are processed, in case you want to see the raw item pool at that stage
-def before_create_items_starting(item_pool: list, world: World, multiworld: MultiWorld, player: int) -> list:
+def before_create_items_starting(item_pool: ManualItemPool, world: World, multiworld: MultiWorld, player: int) -> ManualItemPool:
     final_includes_ow2[player] = {
         'tanks':[],
         'damages':[],
@@ -163,338 +221,120 @@ def before_create_items_starting(item_pool: list, world: World, multiworld: Mult
     locationNamesToRemove = [] # List of location names
     itemNamesToRemove = [] # List of item names
 
-    MAX_HERO_KO_CHECKS = 6
     enable_hero_ko = is_option_enabled(multiworld, player, "enable_hero_elimination_checks")
     hero_ko_checks = get_option_value(multiworld, player, "hero_elimination_check_amount")
 
-    MAX_HERO_MASTERY_CHECKS = 6
     include_mastery_mode = get_option_value(multiworld, player, "include_hero_masteries")
     enable_masteries = include_mastery_mode >= 1
 
-    mastery_list = []
     if enable_masteries is True:
         mastery_check_amount = get_option_value(multiworld, player, "hero_mastery_check_amount")
 
-        all_mastery_list = [
-            "Mercy",
-            "Reinhardt",
-            "Tracer",
-            "Sojourn",
-            "Winston",
-            "DVa",
-            "Echo",
-            "Genji",
-            "Lucio",
-            "Mei",
-            "Soldier 76",
-            "Kiriko",
-            "Cassidy",
-            "Brigitte"
-        ]
-
-        available_mastery_list = []
-        if len(get_option_value(multiworld, player, "available_hero_masteries")) > 0:
-            available_mastery_list.extend(get_option_value(multiworld, player, "available_hero_masteries"))
-        else:
-            available_mastery_list.extend(all_mastery_list)
-        
+        # An empty list of available masteries is the same as all of them
+        available_mastery_list = list(get_option_value(multiworld, player, "available_hero_masteries")) or list(HERO_CATALOG.mastery_heroes)
         num_included_masteries = min(get_option_value(multiworld, player, "hero_masteries_amount"), len(available_mastery_list))
 
+        mastery_list = final_includes_ow2[player]['masteries']
         for _ in range(num_included_masteries):
-            hero_name = random.choice(list(available_mastery_list))
-
-            final_includes_ow2[player]['masteries'].append(hero_name)
+            hero_name = random.choice(available_mastery_list)
             mastery_list.append(hero_name)
-
             available_mastery_list.remove(hero_name)
-            all_mastery_list.remove(hero_name)
-
-            for i in range(mastery_check_amount+1, MAX_HERO_MASTERY_CHECKS):
-                locationNamesToRemove.append(f"Hero Mastery - {hero_name} - Recruit - Check {i}")
-                locationNamesToRemove.append(f"Hero Mastery - {hero_name} - Agent - Check {i}")
-                locationNamesToRemove.append(f"Hero Mastery - {hero_name} - Veteran - Check {i}")
-        
-        for hero_name in all_mastery_list:
-            itemNamesToRemove.append(f"Hero Mastery - {hero_name}")
-            itemNamesToRemove.append(f"Hero Mastery - {hero_name}")
-            itemNamesToRemove.append(f"Hero Mastery - {hero_name}")
-            for i in range(1, MAX_HERO_MASTERY_CHECKS):
-                locationNamesToRemove.append(f"Hero Mastery - {hero_name} - Recruit - Check {i}")
-                locationNamesToRemove.append(f"Hero Mastery - {hero_name} - Agent - Check {i}")
-                locationNamesToRemove.append(f"Hero Mastery - {hero_name} - Veteran - Check {i}")
-        
-        progressive_masteries = (include_mastery_mode == 1)
-
-        if progressive_masteries is False:
-            for hero_name in mastery_list:
-                itemNamesToRemove.append("Hero Mastery - " + hero_name)
-                itemNamesToRemove.append("Hero Mastery - " + hero_name)
-
-
-    include_tanks = is_option_enabled(multiworld, player, "include_tank_heroes")
-    include_damages = is_option_enabled(multiworld, player, "include_damage_heroes")
-    include_supports = is_option_enabled(multiworld, player, "include_support_heroes")
-
-
-    #Handling Tank list
-    tank_list = []
-    if include_tanks is True:
-        all_tank_list = [
-            "DVa",
-            "Doomfist",
-            "Hazard",
-            "Junker Queen",
-            "Mauga",
-            "Orisa",
-            "Ramattra",
-            "Reinhardt",
-            "Roadhog",
-            "Sigma",
-            "Winston",
-            "Wrecking Ball",
-            "Zarya"
-        ]
-
-        available_tank_list = []
-        if len(get_option_value(multiworld, player, "available_tank_heroes")) > 0:
-            available_tank_list.extend(get_option_value(multiworld, player, "available_tank_heroes"))
-        else:
-            available_tank_list.extend(all_tank_list)
-        
-        num_included_tanks = min(get_option_value(multiworld, player, "tank_heroes_amount"), len(available_tank_list))
-        
-        for _ in range(num_included_tanks):
-            st_hero = random.choice(list(available_tank_list))
-
-            final_includes_ow2[player]['tanks'].append(st_hero)
-            tank_list.append(st_hero)
-
-            available_tank_list.remove(st_hero)
-            all_tank_list.remove(st_hero)
-
-            if enable_hero_ko is True:
-                for i in range(hero_ko_checks+1, MAX_HERO_KO_CHECKS):
-                    locationNamesToRemove.append(f"{st_hero} - Get Eliminations ({i})")
-        
-        for hero in all_tank_list:
-            item = next(i for i in item_pool if i.name == hero)
-            item_pool.remove(item)
-
-            if enable_hero_ko is True:
-                locationNamesToRemove.append(f"{hero} - Get Eliminations (1)")
-                locationNamesToRemove.append(f"{hero} - Get Eliminations (2)")
-                locationNamesToRemove.append(f"{hero} - Get Eliminations (3)")
-                locationNamesToRemove.append(f"{hero} - Get Eliminations (4)")
-                locationNamesToRemove.append(f"{hero} - Get Eliminations (5)")    
-
-
-
-    #Handling Damage list
-    damage_list = []
-    if include_damages is True:
-        all_damage_list = [
-            "Ashe",
-            "Bastion",
-            "Cassidy",
-            "Echo",
-            "Freja",
-            "Genji",
-            "Hanzo",
-            "Junkrat",
-            "Mei",
-            "Pharah",
-            "Reaper",
-            "Sojourn",
-            "Soldier 76",
-            "Sombra",
-            "Symmetra",
-            "Torbjorn",
-            "Tracer",
-            "Venture",
-            "Widowmaker"
-        ]
 
-        available_damage_list = []
-        if len(get_option_value(multiworld, player, "available_damage_heroes")) > 0:
-            available_damage_list.extend(get_option_value(multiworld, player, "available_damage_heroes"))
-        else:
-            available_damage_list.extend(all_damage_list)
-        
-        num_included_damages = min(get_option_value(multiworld, player, "damage_heroes_amount"), len(available_damage_list))
-        
-        for _ in range(num_included_damages):
-            st_hero = random.choice(list(available_damage_list))
-
-            final_includes_ow2[player]['damages'].append(st_hero)
-            damage_list.append(st_hero)
-
-            available_damage_list.remove(st_hero)
-            all_damage_list.remove(st_hero)
-            
-            if enable_hero_ko is True:
-                for i in range(hero_ko_checks+1, MAX_HERO_KO_CHECKS):
-                    locationNamesToRemove.append(f"{st_hero} - Get Eliminations ({i})")
-                    
-        for hero in all_damage_list:
-            item = next(i for i in item_pool if i.name == hero)
-            item_pool.remove(item)
-
-            if enable_hero_ko is True:
-                locationNamesToRemove.append(f"{hero} - Get Eliminations (1)")
-                locationNamesToRemove.append(f"{hero} - Get Eliminations (2)")
-                locationNamesToRemove.append(f"{hero} - Get Eliminations (3)")
-                locationNamesToRemove.append(f"{hero} - Get Eliminations (4)")
-                locationNamesToRemove.append(f"{hero} - Get Eliminations (5)")     
-            
-    
-    #Handling Support list
-    support_list = []
-    if include_supports is True:
-        all_support_list = [
-            "Ana",
-            "Baptiste",
-            "Brigitte",
-            "Illari",
-            "Juno",
-            "Kiriko",
-            "Lifeweaver",
-            "Lucio",
-            "Mercy",
-            "Moira",
-            "Zenyatta"
-        ]
+        progressive_masteries = (include_mastery_mode == 1)
 
-        available_support_list = []
-        if len(get_option_value(multiworld, player, "available_support_heroes")) > 0:
-            available_support_list.extend(get_option_value(multiworld, player, "available_support_heroes"))
-        else:
-            available_support_list.extend(all_support_list)
-        
-        num_included_supports = min(get_option_value(multiworld, player, "support_heroes_amount"), len(available_support_list))
-        
-        for _ in range(num_included_supports):
-            st_hero = random.choice(list(available_support_list))
-
-            final_includes_ow2[player]['supports'].append(st_hero)
-            support_list.append(st_hero)
-
-            available_support_list.remove(st_hero)
-            all_support_list.remove(st_hero)
-
-            if enable_hero_ko is True:
-                for i in range(hero_ko_checks+1, MAX_HERO_KO_CHECKS):
-                    locationNamesToRemove.append(f"{st_hero} - Get Eliminations ({i})")
-        
-        for hero in all_support_list:
-            item = next(i for i in item_pool if i.name == hero)
-            item_pool.remove(item)
-
-            if enable_hero_ko is True:
-                locationNamesToRemove.append(f"{hero} - Get Eliminations (1)")
-                locationNamesToRemove.append(f"{hero} - Get Eliminations (2)")
-                locationNamesToRemove.append(f"{hero} - Get Eliminations (3)")
-                locationNamesToRemove.append(f"{hero} - Get Eliminations (4)")
-                locationNamesToRemove.append(f"{hero} - Get Eliminations (5)")   
+        for hero_name in HERO_CATALOG.mastery_heroes:
+            hero = HERO_CATALOG.heroes[hero_name]
+            if hero_name in mastery_list:
+                locationNamesToRemove.extend(hero.get_mastery_locations(mastery_check_amount + 1))
+                # a complete mastery is a single item instead of one per course
+                if progressive_masteries is False:
+                    itemNamesToRemove.extend([hero.mastery_item] * (len(MASTERY_COURSES) - 1))
+            else:
+                locationNamesToRemove.extend(hero.get_mastery_locations())
+                itemNamesToRemove.extend([hero.mastery_item] * len(MASTERY_COURSES))
+
+    # Pick the heroes of each included role, the others and their elimination checks are removed
+    hero_list = []
+    for role in HERO_CATALOG.roles:
+        if not is_option_enabled(multiworld, player, role.include_option):
+            continue
+
+        # An empty list of available heroes is the same as all of them
+        available_hero_list = list(get_option_value(multiworld, player, role.available_option)) or list(role.heroes)
+        num_included_heroes = min(get_option_value(multiworld, player, role.amount_option), len(available_hero_list))
+
+        role_hero_list = final_includes_ow2[player][f"{role.key}s"]
+        for _ in range(num_included_heroes):
+            st_hero = random.choice(available_hero_list)
+            role_hero_list.append(st_hero)
+            available_hero_list.remove(st_hero)
+        hero_list.extend(role_hero_list)
+
+        for hero_name in role.heroes:
+            hero = HERO_CATALOG.heroes[hero_name]
+            if hero_name in role_hero_list:
+                if enable_hero_ko is True:
+                    locationNamesToRemove.extend(hero.elimination_locations[hero_ko_checks:])
+            else:
+                item_pool.take(hero_name)
+                if enable_hero_ko is True:
+                    locationNamesToRemove.extend(hero.elimination_locations)
 
     num_starting_heroes = get_option_value(multiworld, player, "starting_hero_number")    
     
-    hero_list = []
-    hero_list.extend(tank_list)
-    hero_list.extend(damage_list)
-    hero_list.extend(support_list)
-    
     for _ in range(min(num_starting_heroes, len(hero_list))):
-        st_hero = random.choice(list(hero_list))
-        item = next(i for i in item_pool if i.name == st_hero)
-        item_pool.remove(item)
+        st_hero = random.choice(hero_list)
+        item = item_pool.take(st_hero)
         multiworld.push_precollected(item)
         hero_list.remove(st_hero)
 
-    MAX_DEATHMATCH_CHECKS = 6
     include_deathmatch = get_option_value(multiworld, player, "include_deathmatch_checks")
 
     if include_deathmatch > 0:
         deathmatch_check_amount = get_option_value(multiworld, player, "deathmatch_check_amount")
 
-        include_solo_deathmatch = ((include_deathmatch == 1) or (include_deathmatch == 3))
-        include_team_deathmatch = ((include_deathmatch == 2) or (include_deathmatch == 3))
-
-        if include_solo_deathmatch:
-            for i in range(deathmatch_check_amount+1, MAX_DEATHMATCH_CHECKS):
-                    locationNamesToRemove.append(f"Solo Deathmatch - Check {i}")
-        else:
-            for i in range(1, MAX_DEATHMATCH_CHECKS):
-                locationNamesToRemove.append(f"Solo Deathmatch - Check {i}")
-        
-        if include_team_deathmatch:
-            for i in range(deathmatch_check_amount+1, MAX_DEATHMATCH_CHECKS):
-                    locationNamesToRemove.append(f"Team Deathmatch - Check {i}")
-        else:
-            for i in range(1, MAX_DEATHMATCH_CHECKS):
-                locationNamesToRemove.append(f"Team Deathmatch - Check {i}")
-
-    
+        # 1 is solo only, 2 is team only and 3 is both
+        included_modes = {
+            "Solo": (include_deathmatch == 1) or (include_deathmatch == 3),
+            "Team": (include_deathmatch == 2) or (include_deathmatch == 3)
+        }
+        for mode, deathmatch_locations in HERO_CATALOG.deathmatch_locations.items():
+            if included_modes[mode]:
+                locationNamesToRemove.extend(deathmatch_locations[deathmatch_check_amount:])
+            else:
+                locationNamesToRemove.extend(deathmatch_locations)
 
-    max_medals = manual_overwatch2_define_max_medals(multiworld, player, False)
-    multiplier = get_option_value(multiworld, player, "required_medal_percentage")
-    medals = round(max_medals * multiplier / 100)
-    if medals == 0:
-        medals = 1
-    
-    bad_medals = 500 - max_medals
-    for _ in range(bad_medals):
-        itemNamesToRemove.append("Medal")
-    
     # Get the victory item out of the pool:
-    victory_item = next(i for i in item_pool if i.name == "Ultimate Medal (Victory)")
-    item_pool.remove(victory_item)
+    victory_item = item_pool.take("Ultimate Medal (Victory)")
 
-    gather_loc_list = []
+    # Place the victory item at the Gather location of the required medals, the only one created
+    # (see before_is_location_enabled in Helpers.py), except during Universal Tracker's regeneration
     if not hasattr(world.multiworld, "generation_is_fake"):
-        # Get the victory location and place the victory item there
-        gather_loc_list = ["Gather 1 Medal"] # A list of all the victory location names in order
-        for i in range(2, 501):
-            gather_loc_list.append(f"Gather {i} Medals")
-        
-        for i in range(len(gather_loc_list)):
-            if str(medals) in gather_loc_list[i]:
-                victory_id = i
-                break
-
-        gather_location_name = gather_loc_list[victory_id]
-        gather_location = next(l for l in multiworld.get_unfilled_locations(player=player) if l.name == gather_location_name)
+        gather_location = multiworld.get_location(get_gather_location_name(world.required_medals), player)
         gather_location.place_locked_item(victory_item)
     
-    # Remove the extra gather locations
-    for region in multiworld.regions:
-        if region.player == player:
-            for location in list(region.locations):
-                if location.name in gather_loc_list and location.name != gather_location_name:
-                    region.locations.remove(location)
-                    pass
-    
     # Remove items from the pool
     debug = False
     if debug:
         print("Removing items from pool:")
-    for itemName in itemNamesToRemove:
-        if debug:
+        for itemName in itemNamesToRemove:
             print(itemName)
-        item = next(i for i in item_pool if i.name == itemName)
-        item_pool.remove(item)
+    item_pool.remove_names(itemNamesToRemove)
     
+    # Remove the locations in one pass, each region's list is rebuilt at most once
+    locationNamesToRemove = frozenset(locationNamesToRemove)
     for region in multiworld.regions:
         if region.player == player:
-            for location in list(region.locations):
-                if location.name in locationNamesToRemove:
-                    region.locations.remove(location)
+            kept_locations = [location for location in region.locations if location.name not in locationNamesToRemove]
+            if len(kept_locations) != len(region.locations):
+                region.locations = kept_locations
     if hasattr(multiworld, "clear_location_cache"):
         multiworld.clear_location_cache()
 
     return item_pool
 
 # The item pool after starting items are processed but before filler is added, in case you want to see the raw item pool at that stage
-def before_create_items_filler(item_pool: list, world: World, multiworld: MultiWorld, player: int) -> list:
+def before_create_items_filler(item_pool: ManualItemPool, world: World, multiworld: MultiWorld, player: int) -> ManualItemPool:
     # Use this hook to remove items from the item pool
     itemNamesToRemove = [] # List of item names
 
@@ -503,9 +343,7 @@ def before_create_items_filler(item_pool: list, world: World, multiworld: MultiW
     # Because multiple copies of an item can exist, you need to add an item name
     # to the list multiple times if you want to remove multiple copies of it.
 
-    for itemName in itemNamesToRemove:
-        item = next(i for i in item_pool if i.name == itemName)
-        item_pool.remove(item)
+    item_pool.remove_names(itemNamesToRemove)
 
     return item_pool
 
@@ -513,12 +351,11 @@ def before_create_items_filler(item_pool: list, world: World, multiworld: MultiW
 
     ## Place an item at a specific location
     # location = next(l for l in multiworld.get_unfilled_locations(player=player) if l.name == "Location Name")
-    # item_to_place = next(i for i in item_pool if i.name == "Item Name")
+    # item_to_place = item_pool.take("Item Name")
     # location.place_locked_item(item_to_place)
-    # item_pool.remove(item_to_place)
 
 # The complete item pool prior to being set for generation is provided here, in case you want to make changes to it
-def after_create_items(item_pool: list, world: World, multiworld: MultiWorld, player: int) -> list:
+def after_create_items(item_pool: ManualItemPool, world: World, multiworld: MultiWorld, player: int) -> ManualItemPool:
     return item_pool
 
 # Called before rules for accessing regions and locations are created. Not clear why you'd want this, but it's here.
@@ -526,6 +363,9 @@ def before_set_rules(world: World, multiworld: MultiWorld, player: int):
     pass
 
 # Called after rules for accessing regions and locations are created, in case you want to see or modify that information.
+# A region's requires are set on the entrances leading into it, so reaching a region (state.can_reach_region) already
+# includes its requires, and the location rules only check the location's own requires.
+# If you replace an entrance's rule, keep the region's requires in it, or its locations won't check them anymore.
 def after_set_rules(world: World, multiworld: MultiWorld, player: int):
     # Use this hook to modify the access rules for a given location
 
@@ -546,10 +386,14 @@ def after_set_rules(world: World, multiworld: MultiWorld, player: int):
     # location.access_rule = lambda state: old_rule(state) or Example_Rule(state)
 
 # The item name to create is provided before the item is created, in case you want to make changes to it
+# Remove @unchanged_hook if you do, it tells Manual it can skip calling this hook
+@unchanged_hook
 def before_create_item(item_name: str, world: World, multiworld: MultiWorld, player: int) -> str:
     return item_name
 
 # The item that was created is provided after creation, in case you want to modify the item
+# Remove @unchanged_hook if you do, it tells Manual it can skip calling this hook
+@unchanged_hook
 def after_create_item(item: ManualItem, world: World, multiworld: MultiWorld, player: int) -> ManualItem:
     return item
 
@@ -568,12 +412,14 @@ def before_fill_slot_data(slot_data: dict, world: World, multiworld: MultiWorld,
 # This is called after slot data is set and provides the slot data at the time, in case you want to check and modify it after Manual is done with it
 def after_fill_slot_data(slot_data: dict, world: World, multiworld: MultiWorld, player: int) -> dict:
     slot_data['final_includes'] = final_includes_ow2[player]
+    slot_data['medal_budget'] = get_medal_budget(world).counts
     
     return slot_data
 
 # This is called right at the end, in case you want to write stuff to the spoiler log
 def before_write_spoiler(world: World, multiworld: MultiWorld, spoiler_handle) -> None:
-    pass
+    spoiler_handle.write(f"\n\nMedal budget of {multiworld.get_player_name(world.player)}:\n")
+    spoiler_handle.write("\n".join(get_medal_budget(world).get_report()[1:]) + "\n")
 
 # This is called when you want to add information to the hint text
 def before_extend_hint_information(hint_data: dict[int, dict[int, str]], world: World, multiworld: MultiWorld, player: int) -> None:
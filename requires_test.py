@@ -0,0 +1,229 @@
+import math
+import random
+import re
+
+from BaseClasses import CollectionState
+from test.TestBase import WorldTestBase
+from .Game import game_name
+from .Helpers import clamp
+from . import Rules as ManualRules
+from .Rules import parse_area_requires, resolve_requires_count, convert_req_function_args
+from .hooks.Data import MAX_MEDALS, get_gather_location_name, get_goal_location_name
+
+
+def evaluate_requires_string(world, multiworld, player: int, state: CollectionState, area: dict) -> bool:
+    """The string requires evaluator Manual used before requires were compiled, kept as the reference of what they mean:
+    function calls are replaced by their result in the text, then every item reference by 1 or 0,
+    and the 0/1 expression is evaluated with and/or of the same precedence, left to right."""
+    requires = area["requires"]
+    items_counts = world.get_item_counts(player)
+
+    if requires == "":
+        return True
+
+    for func_name, func_args in re.findall(r'\{(\w+)\((.*?)\)\}', requires):
+        args = func_args.split(",")
+        if args == ['']:
+            args.pop()
+
+        if func_name == "ItemValue":
+            # summed from the items themselves, not from the total ManualWorld.collect keeps
+            value_name, value_count = args[0].split(":")
+            total = sum(state.count(item_name, player) * value
+                        for item_name, item in world.item_name_to_item.items()
+                        for name, value in item.get("value", {}).items() if name.lower().strip() == value_name.lower().strip())
+            result = total >= int(value_count)
+        else:
+            func = getattr(ManualRules, func_name, None) or getattr(ManualRules.Rules, func_name)
+            result = func(world, multiworld, state, player, *convert_req_function_args(func, args, area["name"]))
+        if isinstance(result, bool):
+            result = "1" if result else "0"
+        requires = requires.replace("{" + func_name + "(" + func_args + ")}", str(result))
+
+    for item_base in re.findall(r'\|[^|]+\|', requires):
+        item = item_base.lstrip('|@$').rstrip('|')
+        item_name, item_count = item, "1"
+        if ":" in item:
+            item_name, item_count = (part.strip() for part in item.split(":", 1))
+
+        if item_base.startswith('|@'):
+            category_items = [name for name, data in world.item_name_to_item.items() if item_name in data.get("category", [])]
+            pool_count = sum(items_counts.get(name, 0) for name in category_items)
+            total = sum(state.count(name, player) for name in category_items)
+            has = bool(category_items)
+        else:
+            pool_count = items_counts.get(item_name, 0)
+            total = state.count(item_name, player)
+            has = True
+
+        if item_count.lower() == 'all':
+            item_count = pool_count
+        elif item_count.lower() == 'half':
+            item_count = int(pool_count / 2)
+        elif item_count.endswith('%'):
+            item_count = math.ceil(pool_count * clamp(float(item_count[:-1]) / 100, 0, 1))
+        else:
+            item_count = int(item_count)
+
+        requires = requires.replace(item_base, "1" if has and total >= item_count else "0")
+
+    requires = re.sub(r'\s?\bAND\b\s?', '&', requires, flags=re.IGNORECASE)
+    requires = re.sub(r'\s?\bOR\b\s?', '|', requires, flags=re.IGNORECASE)
+
+    # the shunting-yard of the old evaluator, with & and | of the same precedence
+    output, operators = [], []
+    precedence = {"&": 2, "|": 2, "!": 3}
+    for c in requires:
+        if c in "01":
+            output.append(c)
+        elif c in precedence:
+            while operators and operators[-1] != "(" and precedence[c] <= precedence[operators[-1]]:
+                output.append(operators.pop())
+            operators.append(c)
+        elif c == "(":
+            operators.append(c)
+        elif c == ")":
+            while operators[-1] != "(":
+                output.append(operators.pop())
+            operators.pop()
+    output.extend(reversed(operators))
+
+    stack = []
+    for c in output:
+        if c in "01":
+            stack.append(c == "1")
+        elif c == "!":
+            stack.append(not stack.pop())
+        else:
+            second, first = stack.pop(), stack.pop()
+            stack.append((first and second) if c == "&" else (first or second))
+    assert len(stack) == 1, f"Invalid requires {area['requires']!r}"
+    return stack[0]
+
+
+class RequiresTest(WorldTestBase):
+    """Checks that requires are compiled into rules giving the same results as they always have in Manual"""
+    game = game_name
+    run_default_tests = False
+
+    def make_state(self, *item_names: str) -> CollectionState:
+        """A state with only these items, without the starting inventory"""
+        state = CollectionState(self.multiworld)
+        state.prog_items[self.player].clear()
+        for item_name in item_names:
+            state.collect(self.world.create_item(item_name), True)
+        return state
+
+    def assertRequires(self, requires: str|list, cases: list[tuple[list[str], bool]]):
+        area = {"name": f"Test {requires!r}", "requires": requires}
+        node = parse_area_requires(self.world, self.multiworld, self.player, area)
+        rule = node.compile(self.world, self.multiworld, self.player)
+        source = node.to_source(self.world)
+        generated_rule = eval(f"lambda state: {source}", {"player": self.player}) if source is not None else None
+
+        for item_names, expected in cases:
+            with self.subTest(requires=requires, items=item_names):
+                state = self.make_state(*item_names)
+                self.assertEqual(rule(state), expected)
+                if generated_rule is not None:
+                    self.assertEqual(generated_rule(state), expected)
+
+    def test_items_and_categories(self):
+        self.assertRequires("|DVa|", [([], False), (["DVa"], True)])
+        self.assertRequires("|DVa:2|", [(["DVa"], False), (["DVa", "DVa"], True)])
+        self.assertRequires("|@Tank Heroes:2|", [(["DVa", "Ana"], False), (["DVa", "Sigma"], True)])
+        self.assertRequires("|@Medals:12|", [(["Medal"] * 11, False), (["Medal"] * 12, True)])
+        # a category without any item can never be had
+        self.assertRequires("|@Not A Category|", [([], False), (["DVa"], False)])
+
+    def test_left_to_right(self):
+        # and/or have the same precedence and are read left to right
+        self.assertRequires("|DVa| or |Ana| and |Mercy|", [
+            (["DVa"], False),
+            (["DVa", "Mercy"], True),
+            (["Ana", "Mercy"], True),
+        ])
+        self.assertRequires("|DVa| and |Ana| or |Mercy|", [
+            (["Mercy"], True),
+            (["DVa"], False),
+            (["DVa", "Ana"], True),
+        ])
+        self.assertRequires("|DVa| or (|Ana| and |Mercy|)", [
+            (["DVa"], True),
+            (["Ana"], False),
+            (["Ana", "Mercy"], True),
+        ])
+        self.assertRequires("|DVa| & |Ana|", [(["DVa"], False), (["DVa", "Ana"], True)])
+
+    def test_not(self):
+        self.assertRequires("!|DVa|", [([], True), (["DVa"], False)])
+        self.assertRequires("!(|DVa| or |Ana|) and |Mercy|", [
+            (["Mercy"], True),
+            (["Ana", "Mercy"], False),
+        ])
+
+    def test_numbers(self):
+        self.assertRequires("|Medal:10|", [(["Medal"] * 9, False), (["Medal"] * 10, True)])
+        self.assertRequires("10", [([], True)])
+        self.assertRequires("0", [([], False)])
+        self.assertRequires("0 or |DVa|", [([], False), (["DVa"], True)])
+
+    def test_counts_from_the_pool(self):
+        total = self.world.get_item_counts(self.player)["Medal"]
+        for count in ["all", "half", "50%", "100%", "10%"]:
+            needed = resolve_requires_count(count, total)
+            self.assertRequires(f"|Medal:{count}|", [(["Medal"] * (needed - 1), False), (["Medal"] * needed, True)])
+        self.assertEqual(resolve_requires_count("half", 7), 3)
+        self.assertEqual(resolve_requires_count("50%", 7), 4)
+        self.assertEqual(resolve_requires_count("150%", 7), 7)
+
+    def test_list_form(self):
+        self.assertRequires(["DVa", "Ana"], [(["DVa"], False), (["DVa", "Ana"], True)])
+        self.assertRequires(["DVa:2"], [(["DVa"], False), (["DVa", "DVa"], True)])
+        # plain entries, or one of the alternatives
+        self.assertRequires(["DVa", ["Ana", "Mercy"]], [
+            (["DVa"], True),
+            (["Ana"], False),
+            (["Ana", "Mercy"], True),
+        ])
+        self.assertRequires(["DVa", {"or": ["Ana"]}], [(["Ana"], True), (["Mercy"], False)])
+        # with only alternatives one of them is needed, not all of them
+        self.assertRequires([["Ana"], ["Mercy"]], [([], False), (["Ana"], True), (["Mercy"], True)])
+
+    def test_medal_locations(self):
+        required_medals = self.world.required_medals
+        for location_name in [get_gather_location_name(required_medals), get_goal_location_name(required_medals)]:
+            with self.subTest(location=location_name):
+                location = self.multiworld.get_location(location_name, self.player)
+                state = self.make_state(*["Medal"] * (required_medals - 1))
+                self.assertFalse(location.access_rule(state))
+                state.collect(self.world.create_item("Medal"), True)
+                self.assertTrue(location.access_rule(state))
+
+    def test_every_location_requires(self):
+        """Every distinct requires string of the locations (locations.csv and the Gather/Goal ones) gives
+        the same result as the old evaluator, with no item, parts of the player's items, and all of them."""
+        all_items = [item.name for item in self.multiworld.itempool if item.player == self.player]
+        all_items += [item.name for item in self.multiworld.precollected_items[self.player]]
+        all_items += [location.item.name for location in self.multiworld.get_filled_locations(self.player)
+                      if location.item.player == self.player and location.item.code is not None]
+        rng = random.Random(0)
+        inventories = [[], all_items] + [rng.sample(all_items, int(len(all_items) * part)) for part in (0.1, 0.25, 0.5, 0.75, 0.9)]
+        states = [self.make_state(*inventory) for inventory in inventories]
+
+        areas = {}
+        for location in self.world.location_name_to_location.values():
+            if isinstance(location.get("requires"), str) and location["requires"]:
+                areas.setdefault(location["requires"], location)
+        self.assertGreater(len(areas), MAX_MEDALS)
+
+        for requires, area in areas.items():
+            rule = parse_area_requires(self.world, self.multiworld, self.player, area).compile(self.world, self.multiworld, self.player)
+            for index, state in enumerate(states):
+                with self.subTest(requires=requires, inventory=index):
+                    self.assertEqual(rule(state), evaluate_requires_string(self.world, self.multiworld, self.player, state, area))
+
+
+class ProgressiveMasteriesRequiresTest(RequiresTest):
+    """The same with the Hero Mastery requires of progressive masteries, where a function gives the count of an item"""
+    options = {"include_hero_masteries": 1}